@@ -0,0 +1,49 @@
+"""
+Micro-benchmark of the per-call cost of disabled log calls.
+
+Run from the repository root with: python -m benchmarks.bench_logging
+"""
+import json
+import logging
+import os
+import tempfile
+import timeit
+from logger import Logger
+from src.config_manager import ConfigManager
+
+
+NUMBER = 100000
+REPEAT = 5
+
+
+def eager_info(text):
+    # Logger.info before lazy formatting: the message is already built and the
+    # singleton is looked up through __new__ on every call
+    logger = Logger()
+    logger.info(text)
+
+
+def per_call_ns(func):
+    return min(timeit.repeat(func, number=NUMBER, repeat=REPEAT)) / NUMBER * 1e9
+
+
+def main():
+    file_path = os.path.join(tempfile.mkdtemp(), "config.json")
+    with open(file_path, "w") as f:
+        json.dump({"name": "Test", "version": "1.0"}, f)
+    manager = ConfigManager(cache_size=8)
+    manager.read_json(file_path)
+
+    Logger.set_level(logging.WARNING)
+    before = per_call_ns(lambda: eager_info(f"Successfully read JSON file: '{file_path}'"))
+    after = per_call_ns(lambda: Logger.info("Successfully read JSON file: '%s'", file_path))
+    cached_read = per_call_ns(lambda: manager.read_json(file_path))
+    Logger.set_level(logging.INFO)
+
+    print(f"disabled log call, eager f-string: {before:8.1f} ns/call")
+    print(f"disabled log call, lazy %-args:    {after:8.1f} ns/call")
+    print(f"cached read_json at WARNING:       {cached_read:8.1f} ns/call")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,46 +1,426 @@
+import atexit
 import logging
+import logging.handlers
 import os
 import datetime
+import gzip
+import json
+import queue
+import shutil
+import threading
+import time
+
+
+class _BoundedQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that enqueues records on a bounded queue with an overflow policy.
+
+    "block" waits for room in the queue, "drop_new" discards the incoming record
+    and "drop_oldest" discards the oldest queued record to make room. Discarded
+    records are counted in ``dropped``.
+    """
+
+    def __init__(self, log_queue: queue.Queue, overflow: str):
+        super().__init__(log_queue)
+        self.overflow = overflow
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Formatting is left to the listener thread, off the caller's path
+        return record
+
+    def enqueue(self, record):
+        if self.overflow == "block":
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+            return
+        except queue.Full:
+            if self.overflow == "drop_new":
+                self.dropped += 1
+                return
+        try:
+            self.queue.get_nowait()
+            self.queue.task_done()
+            self.dropped += 1
+        except queue.Empty:
+            pass
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _QueueListener(logging.handlers.QueueListener):
+    """
+    QueueListener whose stop sentinel waits for room in a bounded queue.
+    """
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+
+class _SamplingFilter(logging.Filter):
+    """
+    Filter thinning out repetitive records below WARNING; warnings and errors are
+    never sampled.
+
+    Records are grouped by their unformatted message template. With sample_every
+    set to N only one record in N of each template is kept, and with rate_limit
+    set to K at most K records per second are kept for each template and path.
+    Every summary_interval seconds, and on flush, a summary record reporting the
+    number of suppressed records of each template is sent to the handler.
+    """
+
+    MAX_TEMPLATES = 1024  # Sampling counts are restarted beyond this many templates
+
+    def __init__(self, handler, sample_every=1, rate_limit=0, summary_interval=60.0):
+        super().__init__()
+        self.handler = handler
+        self.sample_every = sample_every
+        self.rate_limit = rate_limit
+        self.summary_interval = summary_interval
+        self._lock = threading.Lock()
+        self._seen = {}  # template -> number of records seen
+        self._windows = {}  # (template, path) -> (second, records kept in it)
+        self._suppressed = {}  # template -> records suppressed since the last summary
+        self._last_summary = time.time()
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        template = record.msg
+        with self._lock:
+            keep = True
+            if self.sample_every > 1:
+                # Pre-formatted messages make a template each, keep the counts bounded
+                if template not in self._seen and len(self._seen) >= self.MAX_TEMPLATES:
+                    self._seen.clear()
+                seen = self._seen.get(template, 0)
+                self._seen[template] = seen + 1
+                keep = seen % self.sample_every == 0
+            if keep and self.rate_limit:
+                key = (template, getattr(record, "path", None))
+                second = int(record.created)
+                window, kept = self._windows.get(key, (second, 0))
+                if window != second:
+                    window, kept = second, 0
+                keep = kept < self.rate_limit
+                self._windows[key] = (window, kept + 1)
+            if not keep:
+                self._suppressed[template] = self._suppressed.get(template, 0) + 1
+            summaries = self._take_summaries(record.created)
+        self._emit_summaries(summaries)
+        return keep
+
+    def flush(self):
+        """
+        Send the summaries of all records suppressed so far to the handler.
+        """
+        with self._lock:
+            summaries = self._take_summaries(None)
+        self._emit_summaries(summaries)
+
+    def _take_summaries(self, now):
+        if now is not None and now - self._last_summary < self.summary_interval:
+            return []
+        self._last_summary = now if now is not None else time.time()
+        summaries = list(self._suppressed.items())
+        self._suppressed.clear()
+        # Windows from past seconds will never be used again
+        current = int(self._last_summary)
+        self._windows = {key: value for key, value in self._windows.items() if value[0] == current}
+        return summaries
+
+    def _emit_summaries(self, summaries):
+        for template, count in summaries:
+            summary = logging.LogRecord("root", logging.INFO, __file__, 0, "Suppressed %s similar messages: '%s'",
+                                        (f"{count:,}", template), None)
+            self.handler.acquire()
+            try:
+                self.handler.emit(summary)
+            finally:
+                self.handler.release()
+
+
+class _RotatingFileHandler(logging.FileHandler):
+    """
+    FileHandler writing to "Log_<date>.log" that switches to a new file at midnight
+    and, when max_bytes is set, moves a full file aside as "Log_<date>.<n>.log".
+
+    Rotated files are gzip-compressed and pruned to the newest backup_count files
+    on a background thread, so rotation never waits on compression.
+    """
+
+    def __init__(self, dir_name, max_bytes=0, backup_count=7, compress=True):
+        self.dir_name = dir_name
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.compress = compress
+        self._date = datetime.date.today()
+        self._jobs = queue.Queue()
+        self._worker = threading.Thread(target=self._process_rotated, name="log-rotation", daemon=True)
+        self._worker.start()
+        super().__init__(self._path_for(self._date))
+
+    def _path_for(self, date):
+        return os.path.join(self.dir_name, "Log_" + date.strftime("%Y-%m-%d") + ".log")
+
+    def emit(self, record):
+        try:
+            if self._should_rollover(record):
+                self._do_rollover(datetime.date.fromtimestamp(record.created))
+        except Exception:
+            self.handleError(record)
+            return
+        super().emit(record)
+
+    def _should_rollover(self, record):
+        # Records from other threads can arrive slightly out of order around
+        # midnight, a late one from the previous day goes to the current file
+        if datetime.date.fromtimestamp(record.created) > self._date:
+            return True
+        return bool(self.max_bytes) and self.stream is not None and self.stream.tell() >= self.max_bytes
+
+    def _do_rollover(self, date):
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+        rotated = self.baseFilename
+        if date == self._date:
+            # Size limit reached within the day, move the full file aside
+            stem = rotated[:-len(".log")]
+            n = 1
+            while os.path.exists(f"{stem}.{n}.log") or os.path.exists(f"{stem}.{n}.log.gz"):
+                n += 1
+            os.replace(rotated, f"{stem}.{n}.log")
+            rotated = f"{stem}.{n}.log"
+        self._date = date
+        self.baseFilename = os.path.abspath(self._path_for(date))
+        self.stream = self._open()
+        self._jobs.put(rotated)
+
+    def _process_rotated(self):
+        while True:
+            rotated = self._jobs.get()
+            try:
+                if rotated is None:
+                    return
+                if self.compress and os.path.exists(rotated):
+                    # Appending adds a gzip member, so an existing archive is never overwritten
+                    with open(rotated, "rb") as src, gzip.open(rotated + ".gz", "ab") as dst:
+                        shutil.copyfileobj(src, dst)
+                    os.remove(rotated)
+                self._prune()
+            except Exception:
+                pass  # Never let a failed compression stop later rotations
+            finally:
+                self._jobs.task_done()
+
+    def _prune(self):
+        current = os.path.basename(self.baseFilename)
+        with os.scandir(self.dir_name) as entries:
+            rotated = [entry for entry in entries
+                       if entry.name.startswith("Log_") and entry.name != current]
+        rotated.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in rotated[:max(len(rotated) - self.backup_count, 0)]:
+            os.remove(entry.path)
+
+    def close(self):
+        super().close()
+        if self._worker.is_alive():
+            self._jobs.put(None)
+            self._worker.join()
+
+
+class _JsonFormatter(logging.Formatter):
+    """
+    Formats records as one JSON object per line, including the structured fields
+    passed through ``extra`` (op, path, bytes, duration_ms, rows, cache_hit).
+    """
+
+    FIELDS = ("op", "path", "bytes", "duration_ms", "rows", "cache_hit")
+
+    def format(self, record):
+        entry = {"time": self.formatTime(record), "level": record.levelname, "message": record.getMessage()}
+        for field in self.FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
 
 
 class Logger:
     _instance = None
+    _listener = None
+    _queue_handler = None
+    _sampler = None
+
+    LEVEL = logging.INFO  # Minimum level of the records that are emitted
+    QUEUE_SIZE = 10000  # Maximum number of records waiting to be written
+    OVERFLOW_POLICY = "block"  # "block", "drop_oldest" or "drop_new"
+    ROTATE = False  # Start a new log file at midnight instead of once per process
+    MAX_BYTES = 0  # Also rotate when the log file reaches this size, disabled when 0
+    BACKUP_COUNT = 7  # Number of rotated log files to keep
+    COMPRESS_ROTATED = True  # gzip rotated log files
+    STRUCTURED = False  # Write JSON lines instead of plain text
+    SAMPLE_EVERY = 1  # Keep one in this many records of each INFO message template
+    RATE_LIMIT = 0  # Keep at most this many INFO records per second per template and path, 0 disables it
+    SUMMARY_INTERVAL = 60.0  # Seconds between summaries of the suppressed records
 
     def __new__(cls, *args, **kwargs):
         if not cls._instance:
             cls._instance = super(Logger, cls).__new__(cls, *args, **kwargs)
             cls._instance = logging.getLogger()
-            cls._instance.setLevel(logging.INFO)
-            formatter = logging.Formatter("%(levelname)-8s %(asctime)s - %(message)s")
+            cls._instance.setLevel(cls.LEVEL)
+            if cls.STRUCTURED:
+                formatter = _JsonFormatter()
+            else:
+                formatter = logging.Formatter("%(levelname)-8s %(asctime)s - %(message)s")
             current_time = datetime.datetime.now()
             dir_name = "Logs"
 
             if not os.path.exists(dir_name):
                 os.mkdir(dir_name)
-            file_handler = logging.FileHandler(dir_name + "\\Log_" + current_time.strftime("%Y-%m-%d") + ".log")
+            if cls.ROTATE:
+                file_handler = _RotatingFileHandler(dir_name, cls.MAX_BYTES, cls.BACKUP_COUNT, cls.COMPRESS_ROTATED)
+            else:
+                file_handler = logging.FileHandler(os.path.join(dir_name, "Log_" + current_time.strftime("%Y-%m-%d") + ".log"))
             stream_handler = logging.StreamHandler()
             file_handler.setFormatter(formatter)
             stream_handler.setFormatter(formatter)
 
-            cls._instance.addHandler(file_handler)
-            cls._instance.addHandler(stream_handler)
+            # Records are handed to a background listener that owns the real
+            # handlers, so disk or terminal stalls never block the caller
+            cls._queue_handler = _BoundedQueueHandler(queue.Queue(cls.QUEUE_SIZE), cls.OVERFLOW_POLICY)
+            cls._listener = _QueueListener(cls._queue_handler.queue, file_handler, stream_handler)
+            if cls.SAMPLE_EVERY > 1 or cls.RATE_LIMIT > 0:
+                cls._sampler = _SamplingFilter(cls._queue_handler, cls.SAMPLE_EVERY, cls.RATE_LIMIT,
+                                               cls.SUMMARY_INTERVAL)
+                cls._queue_handler.addFilter(cls._sampler)
+            cls._listener.start()
+            cls._instance.addHandler(cls._queue_handler)
 
         return cls._instance
 
     @staticmethod
-    def info(text):
-        logger = Logger()
-        logger.info(text)
+    def configure(queue_size=None, overflow=None, rotate=None, max_bytes=None, backup_count=None, compress=None,
+                  structured=None, sample_every=None, rate_limit=None, summary_interval=None):
+        """
+        Change the logging pipeline settings. Pending records are flushed and the
+        pipeline is rebuilt with the new settings on the next log call.
+
+        Args:
+            queue_size (int, optional): Maximum number of queued records.
+            overflow (str, optional): What to do when the queue is full: "block",
+                "drop_oldest" or "drop_new".
+            rotate (bool, optional): Roll the log file over at midnight.
+            max_bytes (int, optional): Also roll over when the log file reaches this
+                size. Only used when rotate is enabled; 0 disables it.
+            backup_count (int, optional): Number of rotated log files to keep.
+            compress (bool, optional): gzip rotated log files in the background.
+            structured (bool, optional): Write one JSON object per record instead of
+                plain text lines.
+            sample_every (int, optional): Keep only one in this many INFO records of
+                each message template; 1 keeps them all.
+            rate_limit (int, optional): Keep at most this many INFO records per
+                second for each message template and path; 0 disables the limit.
+            summary_interval (float, optional): Seconds between the summary records
+                reporting how many records were suppressed.
+        """
+        if overflow is not None and overflow not in ("block", "drop_oldest", "drop_new"):
+            raise ValueError(f"Unknown overflow policy '{overflow}'")
+        Logger._shutdown()
+        if queue_size is not None:
+            Logger.QUEUE_SIZE = queue_size
+        if overflow is not None:
+            Logger.OVERFLOW_POLICY = overflow
+        if rotate is not None:
+            Logger.ROTATE = rotate
+        if max_bytes is not None:
+            Logger.MAX_BYTES = max_bytes
+        if backup_count is not None:
+            Logger.BACKUP_COUNT = backup_count
+        if compress is not None:
+            Logger.COMPRESS_ROTATED = compress
+        if structured is not None:
+            Logger.STRUCTURED = structured
+        if sample_every is not None:
+            Logger.SAMPLE_EVERY = sample_every
+        if rate_limit is not None:
+            Logger.RATE_LIMIT = rate_limit
+        if summary_interval is not None:
+            Logger.SUMMARY_INTERVAL = summary_interval
 
     @staticmethod
-    def warn(text):
-        logger = Logger()
-        logger.warning(text)
+    def dropped_records():
+        """
+        Return the number of records discarded because the queue was full.
+        """
+        return Logger._queue_handler.dropped if Logger._queue_handler else 0
 
     @staticmethod
-    def error(text):
-        logger = Logger()
-        logger.error(text)
+    def _shutdown():
+        # Detach the queue first so no record lands behind the stop sentinel, then
+        # stopping the listener writes out every record still in the queue
+        if Logger._instance is None:
+            return
+        Logger._instance.removeHandler(Logger._queue_handler)
+        if Logger._sampler is not None:
+            Logger._sampler.flush()
+        Logger._listener.stop()
+        for handler in Logger._listener.handlers:
+            handler.close()
+        Logger._instance = None
+        Logger._listener = None
+        Logger._queue_handler = None
+        Logger._sampler = None
+
+    @staticmethod
+    def set_level(level):
+        """
+        Set the minimum level of the records that are emitted.
+
+        Args:
+            level (int): A logging level such as logging.WARNING.
+        """
+        Logger.LEVEL = level
+        (Logger._instance or Logger()).setLevel(level)
+
+    @staticmethod
+    def is_enabled_for(level):
+        """
+        Return whether records of the given level would be emitted, so callers can
+        skip building expensive log arguments.
+
+        Args:
+            level (int): A logging level such as logging.INFO.
+        """
+        return (Logger._instance or Logger()).isEnabledFor(level)
+
+    # The message is only %-formatted with args when the record is emitted, the
+    # singleton is read directly instead of going through __new__ and disabled
+    # levels return before any record is created
+    @staticmethod
+    def info(text, *args, extra=None):
+        logger = Logger._instance or Logger()
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(text, *args, extra=extra)
+
+    @staticmethod
+    def warn(text, *args, extra=None):
+        logger = Logger._instance or Logger()
+        if logger.isEnabledFor(logging.WARNING):
+            logger.warning(text, *args, extra=extra)
+
+    @staticmethod
+    def error(text, *args, extra=None):
+        logger = Logger._instance or Logger()
+        if logger.isEnabledFor(logging.ERROR):
+            logger.error(text, *args, extra=extra)
 
     @staticmethod
     def start():
@@ -51,4 +431,8 @@ class Logger:
     @staticmethod
     def finish():
         logger = Logger()
-        logger.info("=" * 20 + "END PROCESS" + "=" * 20)
\ No newline at end of file
+        logger.info("=" * 20 + "END PROCESS" + "=" * 20)
+        Logger._shutdown()
+
+
+atexit.register(Logger._shutdown)
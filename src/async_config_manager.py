@@ -0,0 +1,150 @@
+import asyncio
+import functools
+import os
+import pickle
+import weakref
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from src.config_manager import ConfigManager
+
+
+def _read_with_snapshot(func: Callable, file_path: str, **kwargs) -> Tuple[Any, bytes]:
+    """
+    Run a reader and pickle its result, for the callers joining the read.
+
+    Args:
+        func (callable): The ConfigManager reader.
+        file_path (str): The path to the file.
+        **kwargs: Extra arguments of the reader.
+
+    Returns:
+        tuple: The result of the reader and its pickle.
+    """
+    data = func(file_path, **kwargs)
+    return data, pickle.dumps(data, pickle.HIGHEST_PROTOCOL)
+
+
+class AsyncConfigManager:
+    """
+    asyncio front-end for ConfigManager.
+
+    File I/O and parsing run on an executor so they never block the event loop,
+    a semaphore bounds the number of operations in flight, and concurrent reads
+    of the same file share a single underlying read. An instance may be used
+    from several event loops, each with its own semaphore.
+    """
+
+    def __init__(self, manager: Optional[ConfigManager] = None, executor: Optional[Executor] = None,
+                 max_concurrency: int = 16):
+        """
+        Args:
+            manager (ConfigManager, optional): The manager doing the actual work.
+                A default ConfigManager is created when omitted.
+            executor (Executor, optional): Executor running the blocking calls.
+                Defaults to the event loop's default executor.
+            max_concurrency (int): Maximum number of operations running at once
+                per event loop.
+        """
+        self._manager = manager if manager is not None else ConfigManager()
+        self._executor = executor
+        self._max_concurrency = max_concurrency
+        # Semaphores are bound to the loop they are first used in, so each loop gets its own
+        self._semaphores = weakref.WeakKeyDictionary()  # event loop -> semaphore
+        self._inflight = {}  # (kind, absolute path) -> task of the read in progress
+
+    async def _run(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        Run a blocking call on the executor once a concurrency slot is free.
+
+        Args:
+            func (callable): The blocking function.
+            *args: Positional arguments of the function.
+            **kwargs: Keyword arguments of the function.
+
+        Returns:
+            The result of the function.
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self._max_concurrency)
+        async with semaphore:
+            return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    async def _read(self, kind: str, func: Callable, file_path: str, **kwargs) -> Any:
+        """
+        Run a read, joining a read of the same file that is already in flight.
+
+        The shared read also pickles its result before anyone sees it, and each
+        joined caller unpickles its own copy on the executor, so callers may modify
+        what they are given. Cancelling one caller does not cancel the shared read.
+
+        Args:
+            kind (str): The format of the file, part of the coalescing key.
+            func (callable): The ConfigManager reader.
+            file_path (str): The path to the file.
+            **kwargs: Extra arguments of the reader.
+
+        Returns:
+            The result of the reader.
+        """
+        key = (kind, os.path.abspath(file_path))
+        task = self._inflight.get(key)
+        if task is not None:
+            _, snapshot = await asyncio.shield(task)
+            return await self._run(pickle.loads, snapshot)
+        task = asyncio.ensure_future(self._run(_read_with_snapshot, func, file_path, **kwargs))
+        self._inflight[key] = task
+
+        def forget(done):
+            if self._inflight.get(key) is done:
+                del self._inflight[key]
+
+        task.add_done_callback(forget)
+        data, _ = await asyncio.shield(task)
+        return data
+
+    def _forget_reads(self, file_path: str) -> None:
+        # Reads issued after a write must not join a read that started before it
+        path = os.path.abspath(file_path)
+        for kind in ("json", "xml", "csv"):
+            self._inflight.pop((kind, path), None)
+
+    async def read_json(self, file_path: str) -> Dict:
+        """
+        Reads a JSON file without blocking the event loop. See ConfigManager.read_json.
+        """
+        return await self._read("json", self._manager.read_json, file_path)
+
+    async def read_xml(self, file_path: str, incremental: bool = False) -> Dict:
+        """
+        Reads an XML file without blocking the event loop. See ConfigManager.read_xml.
+        """
+        return await self._read("xml", self._manager.read_xml, file_path, incremental=incremental)
+
+    async def read_csv(self, file_path: str) -> List[Dict]:
+        """
+        Reads a CSV file without blocking the event loop. See ConfigManager.read_csv.
+        """
+        return await self._read("csv", self._manager.read_csv, file_path)
+
+    async def write_json(self, file_path: str, data: Dict) -> None:
+        """
+        Writes a JSON file without blocking the event loop. See ConfigManager.write_json.
+        """
+        self._forget_reads(file_path)
+        await self._run(self._manager.write_json, file_path, data)
+
+    async def write_xml(self, file_path: str, data: Dict) -> None:
+        """
+        Writes an XML file without blocking the event loop. See ConfigManager.write_xml.
+        """
+        self._forget_reads(file_path)
+        await self._run(self._manager.write_xml, file_path, data)
+
+    async def write_csv(self, file_path: str, data: Iterable[Dict], **kwargs) -> None:
+        """
+        Writes a CSV file without blocking the event loop. See ConfigManager.write_csv.
+        """
+        self._forget_reads(file_path)
+        await self._run(self._manager.write_csv, file_path, data, **kwargs)
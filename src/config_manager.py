@@ -1,49 +1,1797 @@
 import json
 import xml.etree.ElementTree as ET
 import csv
-from typing import List, Dict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import IO, Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 from logger import Logger
+from collections import OrderedDict
+import contextlib
+import functools
+import gzip
+import hashlib
+import io
+import itertools
+import lzma
+import multiprocessing
 import os
+import pickle
+import queue
 import shutil
+import stat
+import struct
+import sys
+import tempfile
+import threading
+import uuid
+import weakref
+import zlib
 import datetime
+import logging
+import time
 
+try:
+    import fcntl
+except ImportError:  # Not available on Windows
+    fcntl = None
+
+
+_CSV_WRITE_BUFFER_SIZE = 1024 * 1024  # Size of the file buffer used by write_csv
+
+_BACKUP_STRATEGIES = ("copy", "link", "reflink")
+_BACKUP_COMPRESSION_SUFFIXES = {"gzip": ".gz", "lzma": ".xz", "zlib": ".zz"}  # Appended to ".bak"
+_COMPRESSED_SUFFIXES = {suffix: method for method, suffix in _BACKUP_COMPRESSION_SUFFIXES.items()}
+_DELTA_SUFFIX = ".delta"  # Appended to ".bak" for backups stored as a delta against a full one
+_DELTA_HEADER = "DELTA1"  # Followed by the chain depth and the base name
+_BACKUP_STORES = ("files", "pack")
+_STALE_FILE_AGE = 3600  # Seconds after which leftover staging and temporary backup files are removed
+_PACK_MAGIC = b"CMPACK1\0"
+_PACK_HEADER = struct.Struct("<8sQ")  # Magic, generation of the pack file
+_PACK_RECORD = struct.Struct("<qI16sQQ")  # Backup id (ns and sequence), digest, offset and length in the pack
+_BACKUP_TIMESTAMP_FORMAT = "%Y-%m-%d_%H-%M-%S"  # Backup names written by older versions
+_HASH_CHUNK_SIZE = 1024 * 1024  # Read size used when hashing files for backups
+_FORMATS = {".json": "json", ".xml": "xml", ".csv": "csv"}  # File extension -> format
+_FICLONE = 0x40049409  # Linux ioctl cloning a file's extents (btrfs, XFS, ...)
+_LOCK_DIR_NAME = "config-manager-locks"  # Default folder of the inter-process lock files, in the temp directory
+
+# Process umask, read once so new files get the same permissions as with open()
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def _file_digest(file_path: str) -> str:
+    """
+    Compute the content digest of a file, reading it in chunks.
+
+    Args:
+        file_path (str): The path to the file.
+
+    Returns:
+        str: The hex BLAKE2b digest (128 bits) of the file contents.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _backup_sort_key(backup_id: str) -> Optional[str]:
+    """
+    Return the key ordering a backup id, or None if it is not a backup id.
+
+    Backup ids are "<ns since the epoch, 20 digits>-<sequence, 6 digits>", which
+    sort lexicographically. Timestamps of backups named by older versions are
+    mapped onto the same form.
+
+    Args:
+        backup_id (str): The id from a backup name.
+
+    Returns:
+        str or None: The sortable key.
+    """
+    ns, dash, seq = backup_id.partition("-")
+    if dash and len(ns) == 20 and len(seq) == 6 and ns.isdigit() and seq.isdigit():
+        return backup_id
+    try:
+        timestamp = datetime.datetime.strptime(backup_id, _BACKUP_TIMESTAMP_FORMAT)
+    except ValueError:
+        return None
+    return f"{int(timestamp.timestamp()) * 1_000_000_000:020d}-000000"
+
+
+def _iter_chunks(source: Union[str, bytes]) -> Iterator[bytes]:
+    """
+    Yield the contents of a file, or of an in-memory snapshot, in chunks.
+
+    Args:
+        source (str or bytes): The path to the file, or its contents.
+
+    Yields:
+        bytes: Consecutive chunks of the contents.
+    """
+    if isinstance(source, bytes):
+        for offset in range(0, len(source), _HASH_CHUNK_SIZE):
+            yield source[offset:offset + _HASH_CHUNK_SIZE]
+        return
+    with open(source, "rb") as f:
+        yield from iter(lambda: f.read(_HASH_CHUNK_SIZE), b"")
+
+
+def _write_compressed(chunks: Iterable[bytes], file_path: str, method: str) -> None:
+    """
+    Stream chunks into a compressed file, in constant memory.
+
+    The data goes to a temporary name first, so a partially written file is
+    never mistaken for a backup.
+
+    Args:
+        chunks (iterable of bytes): The uncompressed data.
+        file_path (str): The path to the compressed file to create.
+        method (str): "gzip", "lzma" or "zlib".
+
+    Returns:
+        None
+    """
+    tmp_path = file_path + ".tmp"
+    try:
+        if method == "zlib":
+            compressor = zlib.compressobj()
+            with open(tmp_path, "wb") as f:
+                for chunk in chunks:
+                    f.write(compressor.compress(chunk))
+                f.write(compressor.flush())
+        else:
+            opener = gzip.open if method == "gzip" else lzma.open
+            with opener(tmp_path, "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
+
+
+def _iter_backup_chunks(f: IO[bytes], method: Optional[str]) -> Iterator[bytes]:
+    """
+    Yield the uncompressed contents of a backup in chunks.
+
+    Args:
+        f (file): The backup, opened in binary mode.
+        method (str, optional): The compression of the backup, None if uncompressed.
+
+    Yields:
+        bytes: Consecutive chunks of the original file contents.
+    """
+    if method == "zlib":
+        decompressor = zlib.decompressobj()
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b""):
+            yield decompressor.decompress(chunk)
+        yield decompressor.flush()
+        return
+    if method is not None:
+        f = gzip.GzipFile(fileobj=f, mode="rb") if method == "gzip" else lzma.LZMAFile(f, "rb")
+    yield from iter(lambda: f.read(_HASH_CHUNK_SIZE), b"")
+
+
+def _iter_lines(source: Union[str, bytes]) -> Iterator[bytes]:
+    """
+    Yield the lines of a file, or of an in-memory snapshot, line endings included.
+
+    Args:
+        source (str or bytes): The path to the file, or its contents.
+
+    Yields:
+        bytes: Consecutive lines of the contents.
+    """
+    if isinstance(source, bytes):
+        yield from io.BytesIO(source)
+        return
+    with open(source, "rb") as f:
+        yield from f
+
+
+def _delta_ops(lines: Iterable[bytes], base_hashes: List[int]) -> Iterator[Tuple]:
+    """
+    Encode lines as copies of line ranges from a base and inserted bytes.
+
+    Lines are matched by hash, greedily: a copy is extended while the next line
+    follows it in the base, otherwise the first base line with the same hash
+    starts a new one. The checksum verified on restore guards against the
+    unlikely hash collision.
+
+    Args:
+        lines (iterable of bytes): The lines of the new contents.
+        base_hashes (list of int): The hashes of the base lines, in order.
+
+    Yields:
+        tuple: ("C", first line, line count) or ("I", raw bytes).
+    """
+    first_seen = {}
+    for number, line_hash in enumerate(base_hashes):
+        first_seen.setdefault(line_hash, number)
+    start = count = 0
+    inserted = []
+    inserted_size = 0
+    for line in lines:
+        line_hash = hash(line)
+        if count and start + count < len(base_hashes) and base_hashes[start + count] == line_hash:
+            count += 1
+            continue
+        if count:
+            yield "C", start, count
+            count = 0
+        number = first_seen.get(line_hash)
+        if number is None:
+            inserted.append(line)
+            inserted_size += len(line)
+            if inserted_size >= _HASH_CHUNK_SIZE:
+                yield "I", b"".join(inserted)
+                inserted, inserted_size = [], 0
+            continue
+        if inserted:
+            yield "I", b"".join(inserted)
+            inserted, inserted_size = [], 0
+        start, count = number, 1
+    if count:
+        yield "C", start, count
+    if inserted:
+        yield "I", b"".join(inserted)
+
+
+def _write_delta(lines: Iterable[bytes], base: IO[bytes], base_name: str, depth: int, delta_path: str,
+                 max_size: int) -> bool:
+    """
+    Write the delta of lines against a base backup, unless it grows too large.
+
+    The delta starts with a "DELTA1 <depth> <base name>" line, followed by
+    "C <first> <count>" lines copying base lines and "I <size>" lines followed by
+    that many raw bytes to insert.
+
+    Args:
+        lines (iterable of bytes): The lines of the new contents.
+        base (file): The base backup, opened in binary mode.
+        base_name (str): The file name of the base backup, in the same folder.
+        depth (int): The number of deltas written against the base so far, this one included.
+        delta_path (str): The path to the delta to create.
+        max_size (int): Give up once the delta exceeds this many bytes.
+
+    Returns:
+        bool: True if the delta was written, False if it was too large.
+    """
+    base_hashes = [hash(line) for line in base]
+    tmp_path = delta_path + ".tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            written = f.write(f"{_DELTA_HEADER} {depth} {base_name}\n".encode())
+            for op in _delta_ops(lines, base_hashes):
+                if op[0] == "C":
+                    written += f.write(b"C %d %d\n" % op[1:])
+                else:
+                    written += f.write(b"I %d\n" % len(op[1])) + f.write(op[1])
+                if written > max_size:
+                    return False
+        os.replace(tmp_path, delta_path)
+        return True
+    finally:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+
+
+def _iter_delta_chunks(delta: IO[bytes], base: IO[bytes]) -> Iterator[bytes]:
+    """
+    Yield the contents a delta encodes, in chunks.
+
+    Args:
+        delta (file): The delta, opened in binary mode and positioned after its header.
+        base (file): The base backup, opened in binary mode.
+
+    Yields:
+        bytes: Consecutive chunks of the original file contents.
+
+    Raises:
+        ValueError: If the delta is malformed or the base truncated.
+    """
+    offsets = [0]
+    for line in base:
+        offsets.append(offsets[-1] + len(line))
+    for op in iter(delta.readline, b""):
+        kind, *args = op.split()
+        if kind == b"C" and len(args) == 2:
+            start, end = int(args[0]), int(args[0]) + int(args[1])
+            if end >= len(offsets):
+                raise ValueError(f"Delta copies line {end} of a {len(offsets) - 1} line base")
+            source, remaining = base, offsets[end] - offsets[start]
+            base.seek(offsets[start])
+        elif kind == b"I" and len(args) == 1:
+            source, remaining = delta, int(args[0])
+        else:
+            raise ValueError(f"Malformed delta instruction {op!r}")
+        while remaining:
+            chunk = source.read(min(remaining, _HASH_CHUNK_SIZE))
+            if not chunk:
+                raise ValueError("Delta or base backup is truncated")
+            remaining -= len(chunk)
+            yield chunk
+
+
+def _reflink(src: str, dst: str) -> bool:
+    """
+    Copy src to dst sharing data blocks where the filesystem allows it.
+
+    Tries the FICLONE ioctl first, then os.copy_file_range, which lets the kernel
+    copy (or clone) the data without passing it through user space. A copy that
+    stops short, e.g. because the file shrank, counts as unsupported.
+
+    Args:
+        src (str): The path to the file to copy.
+        dst (str): The path to the new file.
+
+    Returns:
+        bool: True if dst was created, False if neither method is supported or
+        completed the copy.
+    """
+    try:
+        with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+            if fcntl is not None and sys.platform.startswith("linux"):
+                try:
+                    fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+                    shutil.copymode(src, dst)
+                    return True
+                except OSError:
+                    pass
+            if not hasattr(os, "copy_file_range"):
+                raise OSError("copy_file_range is not available")
+            remaining = os.fstat(fsrc.fileno()).st_size
+            while remaining > 0:
+                copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                if copied == 0:
+                    raise OSError(f"copy_file_range stopped with {remaining} bytes left to copy")
+                remaining -= copied
+        shutil.copymode(src, dst)
+        return True
+    except OSError:
+        with contextlib.suppress(OSError):
+            os.remove(dst)
+        return False
+
+
+@contextlib.contextmanager
+def _flock(lock_path: str, shared: bool, timeout: float) -> Iterator[None]:
+    """
+    Hold an fcntl.flock on a lock file, creating it if needed.
+
+    The lock file is never removed, since deleting it could let two processes
+    lock different inodes. Shared lockers proceed unlocked if the lock file cannot
+    be created, e.g. in a read-only directory.
+
+    Args:
+        lock_path (str): The path to the lock file, ending in ".lock".
+        shared (bool): Take a shared (reader) lock instead of an exclusive one.
+        timeout (float): Seconds to wait for the lock.
+
+    Yields:
+        None
+
+    Raises:
+        TimeoutError: If the lock could not be acquired within timeout.
+    """
+    try:
+        fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o666)
+    except OSError:
+        if not shared:
+            raise
+        yield
+        return
+    try:
+        operation = (fcntl.LOCK_SH if shared else fcntl.LOCK_EX) | fcntl.LOCK_NB
+        deadline = time.monotonic() + timeout
+        delay = 0.001
+        while True:
+            try:
+                fcntl.flock(fd, operation)
+                break
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"Timed out waiting for the lock '{lock_path}'")
+                time.sleep(delay)
+                delay = min(delay * 2, 0.05)
+        try:
+            yield
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+        os.close(fd)
+
+
+def _run_worker(work_queue: queue.Queue) -> None:
+    """
+    Run the tasks of a background thread in order, until None is queued.
+
+    Tasks are (function, args) pairs. The thread keeps no reference to a task
+    once it has run, so a ConfigManager is only kept alive by its pending tasks
+    and can be garbage collected while its workers wait.
+
+    Args:
+        work_queue (Queue): The queue of tasks.
+
+    Returns:
+        None
+    """
+    while True:
+        task = work_queue.get()
+        if task is None:
+            work_queue.task_done()
+            return
+        try:
+            func, args = task
+            func(*args)
+        except Exception as e:
+            Logger.error("Background task failed: %s", e)
+        finally:
+            task = func = args = None
+            work_queue.task_done()
+
+
+def _stop_workers(workers: List[Tuple[queue.Queue, threading.Thread]]) -> None:
+    """
+    Let background threads finish their queued work, then stop them, in order.
+
+    This may run on a worker thread itself, when that thread drops the last
+    reference to its ConfigManager; that thread stops without being waited for.
+
+    Args:
+        workers (list of tuple): The queue and thread of each worker. A None item
+            on the queue stops the thread.
+
+    Returns:
+        None
+    """
+    for work_queue, thread in workers:
+        work_queue.put(None)
+        if thread is not threading.current_thread():
+            thread.join()
+
+
+class _JsonBackend:
+    """
+    JSON encoder/decoder used by read_json and write_json, backed by the stdlib.
+
+    Subclasses wrap faster third-party libraries behind the same interface:
+    ``loads`` accepts the raw file bytes and ``dumps`` returns the bytes to write.
+    """
+
+    name = "json"
+    decode_error = json.JSONDecodeError
+
+    def loads(self, raw: bytes) -> Any:
+        return json.loads(raw)
+
+    def dumps(self, data: Any, compact: bool) -> bytes:
+        if compact:
+            return json.dumps(data, separators=(",", ":")).encode("utf-8")
+        return json.dumps(data, indent=4).encode("utf-8")
+
+
+class _OrjsonBackend(_JsonBackend):
+    """
+    JSON backend using orjson. orjson only supports two-space indentation, so
+    non-compact output is indented by 2 instead of 4 spaces.
+    """
+
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+        self._orjson = orjson
+        self.decode_error = orjson.JSONDecodeError
+
+    def loads(self, raw: bytes) -> Any:
+        return self._orjson.loads(raw)
+
+    def dumps(self, data: Any, compact: bool) -> bytes:
+        option = self._orjson.OPT_NON_STR_KEYS
+        if not compact:
+            option |= self._orjson.OPT_INDENT_2
+        return self._orjson.dumps(data, option=option)
+
+
+class _UjsonBackend(_JsonBackend):
+    """
+    JSON backend using ujson.
+    """
+
+    name = "ujson"
+
+    def __init__(self):
+        import ujson
+        self._ujson = ujson
+        self.decode_error = getattr(ujson, "JSONDecodeError", ValueError)
+
+    def loads(self, raw: bytes) -> Any:
+        return self._ujson.loads(raw)
+
+    def dumps(self, data: Any, compact: bool) -> bytes:
+        return self._ujson.dumps(data, indent=0 if compact else 4).encode("utf-8")
+
+
+_JSON_BACKENDS = {backend.name: backend for backend in (_JsonBackend, _OrjsonBackend, _UjsonBackend)}
+
+
+def _load_json_backend(name: str) -> _JsonBackend:
+    """
+    Instantiate the named JSON backend, falling back to the stdlib if its library
+    is not installed.
+
+    Args:
+        name (str): One of "json", "orjson" or "ujson".
+
+    Returns:
+        _JsonBackend: The backend instance.
+
+    Raises:
+        ValueError: If the backend name is unknown.
+    """
+    if name not in _JSON_BACKENDS:
+        raise ValueError(f"Unknown JSON backend '{name}', expected one of {sorted(_JSON_BACKENDS)}")
+    try:
+        return _JSON_BACKENDS[name]()
+    except ImportError:
+        Logger.warn("JSON backend '%s' is not installed, falling back to 'json'.", name)
+        return _JsonBackend()
+
+
+class _ReadCache:
+    """
+    LRU cache of parsed file contents, validated against the file's stat signature.
+
+    Entries are keyed by (kind, absolute path) and remember the
+    (st_mtime_ns, st_size, st_ino) signature of the file they were parsed from,
+    so a lookup only hits when the file on disk is unchanged. The contents are
+    held pickled: unpickling is several times faster than parsing or deep-copying
+    them, and gives every caller its own copy. Eviction is bounded both by the
+    number of entries and by the total size of the pickles. All methods are
+    thread-safe.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._total_bytes = 0
+        self._entries = OrderedDict()  # (kind, path) -> (signature, pickled data)
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, str], signature: Tuple[int, int, int]) -> Tuple[bool, Any]:
+        """
+        Look up a cached value.
+
+        Args:
+            key (tuple): The (kind, path) key of the entry.
+            signature (tuple): The current stat signature of the file.
+
+        Returns:
+            tuple: (True, a new copy of the data) on a hit, (False, None) on a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            if entry[0] != signature:
+                self._drop(key)
+                return False, None
+            self._entries.move_to_end(key)
+            blob = entry[1]
+        return True, pickle.loads(blob)
+
+    def put(self, key: Tuple[str, str], signature: Tuple[int, int, int], data: Any) -> None:
+        """
+        Store a parsed value and evict the least recently used entries if needed.
+
+        Later changes to data do not reach the cache.
+
+        Args:
+            key (tuple): The (kind, path) key of the entry.
+            signature (tuple): The stat signature of the parsed file.
+            data: The parsed contents.
+
+        Returns:
+            None
+        """
+        blob = pickle.dumps(data, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._drop(key)
+            if len(blob) > self._max_bytes:
+                return
+            self._entries[key] = (signature, blob)
+            self._total_bytes += len(blob)
+            while len(self._entries) > self._max_entries or self._total_bytes > self._max_bytes:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+
+    def invalidate(self, path: str) -> None:
+        """
+        Drop every cached entry for the given absolute path.
+
+        Args:
+            path (str): The absolute path of the file.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            for kind in ("json", "xml", "csv"):
+                self._drop((kind, path))
+
+    def _drop(self, key: Tuple[str, str]) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._total_bytes -= len(entry[1])
+
+
+class _ReadWriteLock:
+    """
+    Lock allowing many concurrent readers or a single writer.
+
+    Waiting writers take precedence over new readers so a steady stream of reads
+    cannot starve a write.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    def acquire_read(self) -> None:
+        with self._cond:
+            while self._writer or self._waiting_writers:
+                self._cond.wait()
+            self._readers += 1
+
+    def release_read(self) -> None:
+        with self._cond:
+            self._readers -= 1
+            if not self._readers:
+                self._cond.notify_all()
+
+    def acquire_write(self) -> None:
+        with self._cond:
+            self._waiting_writers += 1
+            try:
+                while self._writer or self._readers:
+                    self._cond.wait()
+            finally:
+                self._waiting_writers -= 1
+            self._writer = True
+
+    def release_write(self) -> None:
+        with self._cond:
+            self._writer = False
+            self._cond.notify_all()
+
+
+class _PathLocks:
+    """
+    Per-path reader/writer locks backed by a fixed pool of striped locks.
+
+    Each path is hashed onto one of ``stripes`` locks, so the number of lock
+    objects stays constant however many paths are used; unrelated paths only
+    contend when they share a stripe. The time spent waiting for locks is
+    accumulated for monitoring.
+    """
+
+    def __init__(self, stripes: int):
+        self._locks = [_ReadWriteLock() for _ in range(stripes)]
+        self._stats_lock = threading.Lock()
+        self._stats = {"read": [0, 0.0, 0.0], "write": [0, 0.0, 0.0]}  # mode -> [count, total, max]
+
+    @contextlib.contextmanager
+    def read(self, file_path: str) -> Iterator[None]:
+        lock = self._lock_for(file_path)
+        started = time.perf_counter()
+        lock.acquire_read()
+        self._record("read", time.perf_counter() - started)
+        try:
+            yield
+        finally:
+            lock.release_read()
+
+    @contextlib.contextmanager
+    def write(self, file_path: str) -> Iterator[None]:
+        lock = self._lock_for(file_path)
+        started = time.perf_counter()
+        lock.acquire_write()
+        self._record("write", time.perf_counter() - started)
+        try:
+            yield
+        finally:
+            lock.release_write()
+
+    @contextlib.contextmanager
+    def write_all(self, file_paths: Iterable[str]) -> Iterator[None]:
+        """
+        Hold the write locks of several paths at once.
+
+        Each stripe is taken once, so paths sharing a stripe do not deadlock, and
+        in index order, so concurrent batches cannot deadlock each other.
+
+        Args:
+            file_paths (iterable of str): The paths to lock.
+
+        Yields:
+            None
+        """
+        indices = sorted({self._index_for(file_path) for file_path in file_paths})
+        acquired = []
+        try:
+            for index in indices:
+                started = time.perf_counter()
+                self._locks[index].acquire_write()
+                acquired.append(self._locks[index])
+                self._record("write", time.perf_counter() - started)
+            yield
+        finally:
+            for lock in reversed(acquired):
+                lock.release_write()
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Return the lock wait metrics.
+
+        Returns:
+            dict: Number of acquisitions and total and maximum wait time in
+            seconds, for read and write locks.
+        """
+        with self._stats_lock:
+            return {f"{mode}_{name}": value
+                    for mode, values in self._stats.items()
+                    for name, value in zip(("acquisitions", "wait_seconds", "max_wait_seconds"), values)}
+
+    def _lock_for(self, file_path: str) -> _ReadWriteLock:
+        return self._locks[self._index_for(file_path)]
+
+    def _index_for(self, file_path: str) -> int:
+        return hash(os.path.abspath(file_path)) % len(self._locks)
+
+    def _record(self, mode: str, waited: float) -> None:
+        with self._stats_lock:
+            values = self._stats[mode]
+            values[0] += 1
+            values[1] += waited
+            values[2] = max(values[2], waited)
+
+
+class _PackStore:
+    """
+    Backup store appending the snapshots of a file to a single pack file.
+
+    Each backup folder holds "<name>.idx", a header naming the generation of the
+    "<name>.<generation>.pack" file followed by one fixed-size record per snapshot.
+    Snapshots are written to the pack before their record is appended, so an
+    interrupted append is never indexed. Compaction copies the retained snapshots
+    to a pack of the next generation and atomically replaces the index, switching
+    readers over in one step. Appends and compactions are serialized per index
+    within the process and, with process locking, across processes by an flock on
+    "<name>.idx.lock", which unlike the index is never replaced.
+    """
+
+    def __init__(self, fsync: bool, stripes: int, process_lock: bool = False, lock_timeout: float = 10.0):
+        self._fsync = fsync
+        self._locks = _PathLocks(stripes)
+        self._process_lock = process_lock
+        self._lock_timeout = lock_timeout
+
+    def entries(self, backup_dir: str, file_name: str) -> List[Tuple[str, str, str]]:
+        """
+        List the snapshots in a pack, oldest first.
+
+        Args:
+            backup_dir (str): The backup folder of the file.
+            file_name (str): The name of the original file.
+
+        Returns:
+            list of tuple: The backup id, name and digest of each snapshot.
+        """
+        index_path = os.path.join(backup_dir, file_name + ".idx")
+        with self._locks.read(index_path):
+            _, records = self._read_index(index_path)
+        return [(backup_id, self._entry_name(file_name, backup_id, digest), digest)
+                for backup_id, digest, _, _ in records]
+
+    def append(self, backup_dir: str, file_name: str, chunks: Iterable[bytes], backup_id: str,
+               digest: str) -> Optional[str]:
+        """
+        Append a snapshot to the pack, unless it matches the newest one.
+
+        Only the index header and last record are read, so appending does not
+        depend on the number of snapshots.
+
+        Args:
+            backup_dir (str): The backup folder of the file.
+            file_name (str): The name of the original file.
+            chunks (iterable of bytes): The contents of the snapshot.
+            backup_id (str): The id of the snapshot, from ConfigManager._next_backup_id.
+            digest (str): The hex digest of the contents.
+
+        Returns:
+            str or None: The name of the new snapshot, or None if it was a duplicate.
+        """
+        index_path = os.path.join(backup_dir, file_name + ".idx")
+        with self._locks.write(index_path), self._index_lock(index_path, shared=False):
+            if not os.path.exists(index_path):
+                self._write_index(index_path, 0, [])
+            with open(index_path, "r+b") as index:
+                magic, generation = _PACK_HEADER.unpack(index.read(_PACK_HEADER.size))
+                if magic != _PACK_MAGIC:
+                    raise ValueError(f"'{index_path}' is not a backup pack index")
+                # Drop a record torn by an interrupted append
+                size = os.fstat(index.fileno()).st_size
+                end = size - (size - _PACK_HEADER.size) % _PACK_RECORD.size
+                if end > _PACK_HEADER.size:
+                    index.seek(end - _PACK_RECORD.size)
+                    if _PACK_RECORD.unpack(index.read(_PACK_RECORD.size))[2].hex() == digest:
+                        return None
+                with open(self._pack_path(backup_dir, file_name, generation), "ab") as pack:
+                    offset = pack.tell()
+                    for chunk in chunks:
+                        pack.write(chunk)
+                    length = pack.tell() - offset
+                    self._sync(pack)
+                index.seek(end)
+                index.truncate()
+                index.write(self._pack_record(backup_id, digest, offset, length))
+                self._sync(index)
+        return self._entry_name(file_name, backup_id, digest)
+
+    def open_entry(self, backup_dir: str, file_name: str, name: str, stack: contextlib.ExitStack) -> Iterator[bytes]:
+        """
+        Open a snapshot for streaming.
+
+        Args:
+            backup_dir (str): The backup folder of the file.
+            file_name (str): The name of the original file.
+            name (str): The name of the snapshot, as listed by entries.
+            stack (ExitStack): Closes the opened pack.
+
+        Returns:
+            iterator of bytes: The chunks of the snapshot.
+
+        Raises:
+            LookupError: If the pack holds no snapshot of that name.
+        """
+        index_path = os.path.join(backup_dir, file_name + ".idx")
+        with self._locks.read(index_path), self._index_lock(index_path, shared=True):
+            generation, records = self._read_index(index_path)
+            for backup_id, digest, offset, length in records:
+                if self._entry_name(file_name, backup_id, digest) == name:
+                    # The open pack stays readable even if compaction replaces it
+                    pack = stack.enter_context(open(self._pack_path(backup_dir, file_name, generation), "rb"))
+                    return self._iter_range(pack, offset, length)
+        raise LookupError(f"No snapshot named '{name}' in '{index_path}'")
+
+    def compact(self, backup_dir: str, file_name: str, keep: int) -> int:
+        """
+        Rewrite a pack with only its newest snapshots.
+
+        Args:
+            backup_dir (str): The backup folder of the file.
+            file_name (str): The name of the original file.
+            keep (int): The number of snapshots to retain.
+
+        Returns:
+            int: The number of snapshots dropped.
+        """
+        index_path = os.path.join(backup_dir, file_name + ".idx")
+        with self._locks.write(index_path), self._index_lock(index_path, shared=False):
+            generation, records = self._read_index(index_path)
+            if len(records) <= keep:
+                return 0
+            old_pack = self._pack_path(backup_dir, file_name, generation)
+            new_pack = self._pack_path(backup_dir, file_name, generation + 1)
+            retained = []
+            try:
+                with open(old_pack, "rb") as src, open(new_pack, "wb") as dst:
+                    for backup_id, digest, offset, length in records[-keep:]:
+                        retained.append((backup_id, digest, dst.tell(), length))
+                        for chunk in self._iter_range(src, offset, length):
+                            dst.write(chunk)
+                    self._sync(dst)
+                self._write_index(index_path, generation + 1, retained)
+            except BaseException:
+                with contextlib.suppress(OSError):
+                    os.remove(new_pack)
+                raise
+            os.remove(old_pack)
+        return len(records) - keep
+
+    @contextlib.contextmanager
+    def _index_lock(self, index_path: str, shared: bool) -> Iterator[None]:
+        if not self._process_lock:
+            yield
+            return
+        with _flock(index_path + ".lock", shared, self._lock_timeout):
+            yield
+
+    @staticmethod
+    def _entry_name(file_name: str, backup_id: str, digest: str) -> str:
+        return f"{file_name}.{backup_id}.{digest}.bak"
+
+    @staticmethod
+    def _pack_record(backup_id: str, digest: str, offset: int, length: int) -> bytes:
+        ns, _, seq = backup_id.partition("-")
+        return _PACK_RECORD.pack(int(ns), int(seq), bytes.fromhex(digest), offset, length)
+
+    @staticmethod
+    def _pack_path(backup_dir: str, file_name: str, generation: int) -> str:
+        return os.path.join(backup_dir, f"{file_name}.{generation}.pack")
+
+    @staticmethod
+    def _read_index(index_path: str) -> Tuple[int, List[Tuple[str, str, int, int]]]:
+        try:
+            with open(index_path, "rb") as f:
+                raw = f.read()
+        except FileNotFoundError:
+            return 0, []
+        magic, generation = _PACK_HEADER.unpack_from(raw)
+        if magic != _PACK_MAGIC:
+            raise ValueError(f"'{index_path}' is not a backup pack index")
+        end = len(raw) - (len(raw) - _PACK_HEADER.size) % _PACK_RECORD.size
+        return generation, [(f"{ns:020d}-{seq:06d}", digest.hex(), offset, length) for ns, seq, digest, offset, length
+                            in _PACK_RECORD.iter_unpack(raw[_PACK_HEADER.size:end])]
+
+    def _write_index(self, index_path: str, generation: int, records: List[Tuple[str, str, int, int]]) -> None:
+        tmp_path = index_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_PACK_HEADER.pack(_PACK_MAGIC, generation))
+            for record in records:
+                f.write(self._pack_record(*record))
+            self._sync(f)
+        os.replace(tmp_path, index_path)
+
+    def _sync(self, f: IO[bytes]) -> None:
+        f.flush()
+        if self._fsync:
+            os.fsync(f.fileno())
+
+    @staticmethod
+    def _iter_range(f: IO[bytes], offset: int, length: int) -> Iterator[bytes]:
+        f.seek(offset)
+        while length:
+            chunk = f.read(min(length, _HASH_CHUNK_SIZE))
+            if not chunk:
+                raise ValueError(f"Backup pack '{f.name}' is truncated")
+            length -= len(chunk)
+            yield chunk
+
+
+class _LazyProcessPool:
+    """
+    Process pool created on first use and shared by the threads of a read_many call.
+
+    Workers are spawned rather than forked: forking a process whose other threads
+    (the log listener, reader threads) may hold locks can deadlock the child.
+    """
 
-class ConfigManager:
     def __init__(self):
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def submit(self, func: Callable, *args) -> Any:
+        """
+        Run a function in a worker process, starting the pool if needed.
+
+        Args:
+            func (callable): A picklable module-level function.
+            *args: Its picklable arguments.
+
+        Returns:
+            The result of the function.
+        """
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(mp_context=multiprocessing.get_context("spawn"))
+            pool = self._pool
+        return pool.submit(func, *args).result()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+
+class ConfigManager:
+    def __init__(self, cache_size: int = 0, cache_max_bytes: int = 64 * 1024 * 1024,
+                 json_backend: str = "json", json_compact: bool = False, fsync: bool = False,
+                 backup_strategy: str = "copy", lock_stripes: int = 64, process_lock: bool = False,
+                 lock_timeout: float = 10.0, async_backups: bool = False, backup_queue_size: int = 64,
+                 backup_compression: Optional[str] = None, backup_delta: bool = False,
+                 delta_rebase_every: int = 16, backup_store: str = "files", lock_dir: Optional[str] = None):
+        """
+        Args:
+            cache_size (int): Maximum number of parsed files kept in the read cache.
+                The cache is disabled when 0 (the default). Reads return a copy of
+                the cached contents, which callers are free to modify.
+            cache_max_bytes (int): Maximum total size, in bytes, of the pickled
+                contents kept in the read cache.
+            json_backend (str): JSON library used by read_json/write_json: "json",
+                "orjson" or "ujson". Falls back to "json" if it is not installed.
+            json_compact (bool): Write JSON without indentation or extra whitespace.
+            fsync (bool): fsync written files and their directory before returning,
+                making writes durable across crashes at the cost of latency.
+            backup_strategy (str): How backups are created: "copy" copies the file,
+                "link" hard-links the current file into the backup folder and
+                "reflink" clones its data blocks. Since writers replace files
+                rather than modify them, a link keeps the old contents. Both fall
+                back to a copy when they are not supported, e.g. across filesystems.
+            lock_stripes (int): Number of reader/writer locks shared by all paths.
+                Reads of a path run concurrently, writes to it are exclusive.
+            process_lock (bool): Also coordinate with other processes through an
+                fcntl.flock lock on a lock file in lock_dir: writers hold it
+                exclusively around the backup and the write, readers of existing
+                files hold it shared. POSIX only.
+            lock_timeout (float): Seconds to wait for the inter-process lock before
+                the operation fails.
+            async_backups (bool): Only snapshot the file before a write (a hard link,
+                or its bytes in memory) and let a background thread, started by the
+                first backup, write the backup and prune old ones. Call
+                flush_backups() to wait for them.
+            backup_queue_size (int): Maximum number of snapshots waiting for the
+                background thread; writers block when it is full.
+            backup_compression (str, optional): Compress backups with "gzip", "lzma"
+                or "zlib", streaming in constant memory. Compressed backups are
+                always written out, whatever the backup strategy.
+            backup_delta (bool): Store backups as line-level deltas against the
+                newest full backup, so their size follows the size of the change.
+                Retention keeps the full backups that retained deltas need.
+            delta_rebase_every (int): Write a full backup after this many deltas.
+                One is also written whenever a delta would exceed half the file.
+            backup_store (str): "files" to keep each backup in its own file, or
+                "pack" to append them to a single pack file per config with an
+                offset index. Packs are compacted on a background thread, started
+                by the first compaction, once they hold twice as many snapshots as
+                are retained.
+            lock_dir (str, optional): Folder of the inter-process lock files, which
+                every cooperating process must share. Defaults to
+                "config-manager-locks" in the system temp directory.
+
+        Raises:
+            ValueError: If the JSON backend name, backup strategy or backup compression
+                is unknown, or if compression, deltas or a pack store are combined.
+        """
+        if backup_strategy not in _BACKUP_STRATEGIES:
+            raise ValueError(f"Unknown backup strategy '{backup_strategy}', expected one of {_BACKUP_STRATEGIES}")
+        if backup_compression is not None and backup_compression not in _BACKUP_COMPRESSION_SUFFIXES:
+            raise ValueError(f"Unknown backup compression '{backup_compression}', "
+                             f"expected one of {tuple(_BACKUP_COMPRESSION_SUFFIXES)}")
+        if backup_compression is not None and backup_delta:
+            raise ValueError("Backup deltas cannot be combined with backup compression")
+        if backup_store not in _BACKUP_STORES:
+            raise ValueError(f"Unknown backup store '{backup_store}', expected one of {_BACKUP_STORES}")
+        if backup_store == "pack" and (backup_compression is not None or backup_delta):
+            raise ValueError("The pack backup store cannot be combined with backup compression or deltas")
         self._MAX_BACKUPS = 5  # Maximum number of backups to keep
         self._BACKUP_FOLDER_NAME = "config-backups"
+        self._cache = _ReadCache(cache_size, cache_max_bytes) if cache_size > 0 else None
+        self._json = _load_json_backend(json_backend)
+        self._json_compact = json_compact
+        self._fsync = fsync
+        self._backup_strategy = backup_strategy
+        self._backup_compression = backup_compression
+        self._backup_delta = backup_delta
+        self._delta_rebase_every = delta_rebase_every
+        self._locks = _PathLocks(lock_stripes)
+        if process_lock and fcntl is None:
+            Logger.warn("Inter-process locking requires fcntl, which is not available on this platform.")
+            process_lock = False
+        self._process_lock = process_lock
+        self._lock_timeout = lock_timeout
+        self._lock_dir = lock_dir if lock_dir is not None else os.path.join(tempfile.gettempdir(), _LOCK_DIR_NAME)
+        self._backup_id_lock = threading.Lock()
+        self._last_backup_ns = 0
+        self._backup_seq = 0
+        self._swept = set()  # Backup folders already cleared of stale files
+        self._async_backups = async_backups
+        self._backup_queue_size = backup_queue_size
+        self._workers_lock = threading.Lock()
+        self._closed = False
+        self._workers = []  # Queue and thread of each background worker
+        self._queues = {}  # Worker name -> queue of the worker, once started
+        self._pack = None
+        if backup_store == "pack":
+            self._pack = _PackStore(fsync, lock_stripes, self._process_lock, lock_timeout)
+        # Queued work is finished when the manager is collected or at interpreter
+        # exit, rather than lost with the daemon threads
+        self._stop_workers = weakref.finalize(self, _stop_workers, self._workers)
+
+
+    def __enter__(self) -> "ConfigManager":
+        return self
+
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+    def close(self) -> None:
+        """
+        Write out the deferred backups and finish the pending pack compactions,
+        then stop the background threads.
+
+        This also happens when an unclosed manager is garbage collected, which
+        its idle threads do not prevent, and at interpreter exit. Afterwards,
+        backups are written and packs compacted synchronously.
+
+        Returns:
+            None
+        """
+        with self._workers_lock:
+            self._closed = True
+        self._stop_workers()
+
+
+    def _worker_queue(self, name: str, maxsize: int) -> Optional[queue.Queue]:
+        """
+        Return the task queue of a background thread, starting the thread on first use.
+
+        The thread runs _run_worker, which holds no reference to this manager.
+
+        Args:
+            name (str): The name of the thread.
+            maxsize (int): The capacity of the queue, unbounded when 0.
+
+        Returns:
+            Queue or None: The queue of (function, args) tasks, or None once closed.
+        """
+        with self._workers_lock:
+            if self._closed:
+                return None
+            work_queue = self._queues.get(name)
+            if work_queue is None:
+                work_queue = self._queues[name] = queue.Queue(maxsize)
+                thread = threading.Thread(target=_run_worker, args=(work_queue,), name=name, daemon=True)
+                thread.start()
+                self._workers.append((work_queue, thread))
+            return work_queue
+
+
+    def _read_cached(self, kind: str, file_path: str, parse: Callable[[str], Any]) -> Tuple[Any, bool, Optional[int]]:
+        """
+        Parse a file, serving it from the read cache when the file is unchanged.
+
+        The cache holds a pickled copy of the contents and every caller gets a
+        fresh one, so callers may modify what they are given.
+
+        Args:
+            kind (str): The format of the file, used as part of the cache key.
+            file_path (str): The path to the file.
+            parse (callable): Function parsing the file at the given path.
+
+        Returns:
+            tuple: The parsed contents of the file, whether they came from the cache
+            and the file size from the stat the cache check made (None without a
+            cache), so logging the read needs no second stat.
+        """
+        if self._cache is None:
+            return parse(file_path), False, None
+        st = os.stat(file_path)
+        key = (kind, os.path.abspath(file_path))
+        signature = (st.st_mtime_ns, st.st_size, st.st_ino)
+        hit, data = self._cache.get(key, signature)
+        if not hit:
+            data = parse(file_path)
+            self._cache.put(key, signature, data)
+        return data, hit, st.st_size
+
+
+    @contextlib.contextmanager
+    def _file_lock(self, file_path: str, shared: bool) -> Iterator[None]:
+        """
+        Hold the inter-process lock of a file when process locking is enabled.
+
+        The lock is an fcntl.flock on a lock file in the lock folder, named after
+        the file and a hash of its resolved path, so config folders are not
+        cluttered and every path to the file shares the lock. The lock file is
+        never removed, since deleting it could let two processes lock different
+        inodes. Reads of a missing file take no lock and create no lock file, and
+        readers proceed unlocked if the lock file cannot be created.
+
+        Args:
+            file_path (str): The path to the file to lock.
+            shared (bool): Take a shared (reader) lock instead of an exclusive one.
+
+        Yields:
+            None
+
+        Raises:
+            TimeoutError: If the lock could not be acquired within lock_timeout.
+        """
+        if not self._process_lock or (shared and not os.path.exists(file_path)):
+            yield
+            return
+        if not shared:
+            os.makedirs(self._lock_dir, exist_ok=True)
+        real_path = os.path.realpath(file_path)
+        path_digest = hashlib.blake2b(os.fsencode(real_path), digest_size=8).hexdigest()
+        lock_path = os.path.join(self._lock_dir, f"{os.path.basename(real_path)}-{path_digest}.lock")
+        with _flock(lock_path, shared, self._lock_timeout):
+            yield
+
+
+    def lock_stats(self) -> Dict[str, float]:
+        """
+        Return how often and how long operations waited for the per-path locks.
+
+        Returns:
+            dict: read/write acquisitions, total wait seconds and max wait seconds.
+        """
+        return self._locks.stats()
+
+
+    def _log_op(self, op: str, file_path: str, started: float, message: str, *args,
+                size: Optional[int] = None, rows: Optional[int] = None, cache_hit: Optional[bool] = None) -> None:
+        """
+        Log the successful completion of an operation with its structured fields.
+
+        Nothing is computed when INFO records are disabled. Fields that are not
+        given are left out rather than looked up.
+
+        Args:
+            op (str): The operation name, e.g. "read_json" or "backup".
+            file_path (str): The path to the file the operation worked on.
+            started (float): time.perf_counter() value taken when the operation began.
+            message (str): The %-style log message.
+            *args: The arguments of the log message.
+            size (int, optional): The number of bytes read or written.
+            rows (int, optional): The number of CSV rows read or written.
+            cache_hit (bool, optional): Whether a read was served from the cache.
+
+        Returns:
+            None
+        """
+        if not Logger.is_enabled_for(logging.INFO):
+            return
+        fields = {"op": op, "path": os.fspath(file_path), "bytes": size,
+                  "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+                  "rows": rows, "cache_hit": cache_hit}
+        Logger.info(message, *args, extra=fields)
+
+
+    @staticmethod
+    def _log_failure(op: str, file_path: str, started: float, message: str, *args) -> None:
+        """
+        Log the failure of an operation with the structured fields of _log_op.
+
+        Args:
+            op (str): The operation name, e.g. "read_json" or "backup".
+            file_path (str): The path to the file the operation worked on.
+            started (float): time.perf_counter() value taken when the operation began.
+            message (str): The %-style log message.
+            *args: The arguments of the log message.
+
+        Returns:
+            None
+        """
+        fields = {"op": op, "path": os.fspath(file_path),
+                  "duration_ms": round((time.perf_counter() - started) * 1000, 3)}
+        Logger.error(message, *args, extra=fields)
+
+
+    def _invalidate_cache(self, file_path: str) -> None:
+        """
+        Drop any cached contents of a file that has been rewritten.
+
+        Args:
+            file_path (str): The path to the file.
+
+        Returns:
+            None
+        """
+        if self._cache is not None:
+            self._cache.invalidate(os.path.abspath(file_path))
+
+
+    @contextlib.contextmanager
+    def _atomic_open(self, file_path: str, mode: str, **kwargs) -> Iterator[IO]:
+        """
+        Open a temporary file next to file_path that replaces it on successful exit.
+
+        The temporary file is created in the destination directory and moved into
+        place with os.replace, so readers see either the old or the new contents,
+        never a partially written file. On error the temporary file is removed and
+        the destination is left untouched. Symlinks are resolved first, so the file
+        they point to is replaced and the link itself is kept.
+
+        Args:
+            file_path (str): The path to the file to write.
+            mode (str): The mode to open the temporary file with ('w' or 'wb').
+            **kwargs: Extra arguments passed to open().
+
+        Yields:
+            file: The open temporary file.
+        """
+        file_path = os.path.realpath(file_path)
+        directory = os.path.dirname(file_path)
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(file_path)}.", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, mode, **kwargs) as f:
+                yield f
+                f.flush()
+                if self._fsync:
+                    os.fsync(f.fileno())
+            # mkstemp creates the file as 0600, keep the permissions of the original
+            try:
+                os.chmod(tmp_path, stat.S_IMODE(os.stat(file_path).st_mode))
+            except FileNotFoundError:
+                os.chmod(tmp_path, 0o666 & ~_UMASK)
+            os.replace(tmp_path, file_path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(tmp_path)
+            raise
+        if self._fsync and hasattr(os, "O_DIRECTORY"):
+            dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+
+
+    def _backup_file(self, file_path: str, manage_backups: bool = True) -> None:
+        """
+        Create a backup of the specified file, named after a unique backup id.
+
+        No backup is created when the file's content digest matches the newest
+        backup's, which is stored in the backup name and never recomputed.
+
+        Backups of each file are kept in their own subdirectory of the backup
+        folder, so creating and pruning them never lists other files' backups.
+
+        Args:
+            file_path (str): The path to the file to back up.
+            manage_backups (bool): Prune old backups afterwards. Batch writers turn
+                this off and prune once for the whole batch. Deferred backups are
+                always pruned by the background thread.
+
+        Returns:
+            None
+        """
+        started = time.perf_counter()
+        if not os.path.exists(file_path):
+            Logger.warn("File '%s' does not exist. No backup created.", file_path)
+            return
+        try:
+            # Create a backup directory if it doesn't exist
+            backup_dir = self._backup_dir_for(file_path)
+            os.makedirs(backup_dir, exist_ok=True)
+            backup_id = self._next_backup_id()
+            backup_queue = None
+            if self._async_backups:
+                backup_queue = self._worker_queue("config-backups", self._backup_queue_size)
+            if backup_queue is not None:
+                # Only take a cheap snapshot here, the worker thread does the rest
+                backup_queue.put((self._store_deferred_backup,
+                                  (file_path, self._snapshot(file_path, backup_dir), backup_id, started)))
+            else:
+                self._store_backup(file_path, file_path, backup_id, started, manage_backups)
+        except Exception as e:
+            self._log_failure("backup", file_path, started, "Failed to create backup for '%s': %s", file_path, e)
+
+
+    def _next_backup_id(self) -> str:
+        """
+        Return a new backup id, "<ns since the epoch>-<sequence>".
+
+        Ids increase monotonically for this instance: the sequence number tells
+        apart backups taken within the clock resolution, and a clock stepping back
+        keeps the last time seen. Both parts are zero-padded, so ids sort
+        lexicographically.
+
+        Returns:
+            str: The backup id.
+        """
+        with self._backup_id_lock:
+            ns = time.time_ns()
+            if ns > self._last_backup_ns:
+                self._last_backup_ns, self._backup_seq = ns, 0
+            else:
+                self._backup_seq += 1
+            return f"{self._last_backup_ns:020d}-{self._backup_seq:06d}"
+
+
+    def _snapshot(self, file_path: str, backup_dir: str) -> Union[str, bytes]:
+        """
+        Capture the current contents of a file for a deferred backup.
+
+        The file is hard-linked to a hidden staging name in its backup folder, which
+        keeps the old contents since writers replace files rather than modify them.
+        When linking is not possible the contents are read into memory.
+
+        Args:
+            file_path (str): The path to the file to snapshot.
+            backup_dir (str): The backup folder of the file.
+
+        Returns:
+            str or bytes: The path of the staged link, or the file contents.
+        """
+        staged_path = os.path.join(backup_dir, f".{os.path.basename(file_path)}.{uuid.uuid4().hex}.pending")
+        try:
+            os.link(file_path, staged_path)
+            return staged_path
+        except OSError:
+            with open(file_path, "rb") as f:
+                return f.read()
+
+
+    def _store_backup(self, file_path: str, source: Union[str, bytes], backup_id: str, started: float,
+                      manage_backups: bool, staged: bool = False) -> None:
+        """
+        Turn a file or a snapshot of it into a backup, unless it is a duplicate.
+
+        Args:
+            file_path (str): The path to the original file.
+            source (str or bytes): The path to read the contents from, or the contents.
+            backup_id (str): The id taken when the contents were captured.
+            started (float): time.perf_counter() value taken when the backup began.
+            manage_backups (bool): Prune old backups afterwards.
+            staged (bool): source is a staged snapshot that can be moved into place.
+
+        Returns:
+            None
+        """
+        backup_dir = self._backup_dir_for(file_path)
+        file_name = os.path.basename(file_path)
+
+        # Skip the backup when the newest one already holds the same content
+        if isinstance(source, bytes):
+            digest = hashlib.blake2b(source, digest_size=16).hexdigest()
+        else:
+            digest = _file_digest(source)
+        if self._pack is not None:
+            name = self._pack.append(backup_dir, file_name, _iter_chunks(source), backup_id, digest)
+            if name is None:
+                Logger.info("Backup skipped, '%s' is unchanged since the last snapshot", file_path)
+                return
+            self._log_op("backup", file_path, started, "Backup '%s' appended to the pack in '%s'", name, backup_dir)
+            if manage_backups:
+                self._manage_backups(backup_dir, file_name)
+            return
+        backups = self._list_backups(backup_dir, file_name)
+        if backups and backups[-1][2] == digest:
+            Logger.info("Backup skipped, '%s' is unchanged since '%s'", file_path, backups[-1][1])
+            return
+
+        # Name the backup after the id taken when the contents were captured and their digest
+        backup_path = os.path.join(backup_dir, f"{file_name}.{backup_id}.{digest}.bak")
+        delta_path = self._store_delta(source, backup_dir, backup_path, backups) if self._backup_delta else None
+        if delta_path is not None:
+            backup_path = delta_path
+        elif self._backup_compression is not None:
+            backup_path += _BACKUP_COMPRESSION_SUFFIXES[self._backup_compression]
+            _write_compressed(_iter_chunks(source), backup_path, self._backup_compression)
+        elif isinstance(source, bytes):
+            with open(backup_path, "wb") as f:
+                f.write(source)
+        elif staged:
+            os.replace(source, backup_path)
+        else:
+            self._copy_to_backup(source, backup_path)
+        self._log_op("backup", file_path, started, "Backup created at: '%s'", backup_path)
+
+        # Manage the number of backups
+        if manage_backups:
+            self._manage_backups(backup_dir, file_name)
+
+
+    def _store_delta(self, source: Union[str, bytes], backup_dir: str, backup_path: str,
+                     backups: List[Tuple[str, str, Optional[str]]]) -> Optional[str]:
+        """
+        Store a backup as a delta against the newest full backup, if worthwhile.
+
+        The number of deltas written against a base is carried in each delta's
+        header, since retention may already have deleted the earlier ones.
+
+        Args:
+            source (str or bytes): The path to read the contents from, or the contents.
+            backup_dir (str): The backup folder of the file.
+            backup_path (str): The path the backup would have as a full copy.
+            backups (list): The existing backups, as returned by _list_backups.
+
+        Returns:
+            str or None: The path of the delta, or None if a full backup is due.
+        """
+        if not backups:
+            return None  # No full backup to delta against
+        name = backups[-1][1]
+        depth = 1
+        if name.endswith(_DELTA_SUFFIX):
+            with open(os.path.join(backup_dir, name), "rb") as delta:
+                header = self._delta_header(delta)
+            if header is None:
+                return None
+            name, depth = header[0], header[1] + 1
+        if not name.endswith(".bak") or depth > self._delta_rebase_every:
+            return None
+        size = len(source) if isinstance(source, bytes) else os.path.getsize(source)
+        delta_path = backup_path + _DELTA_SUFFIX
+        with open(os.path.join(backup_dir, name), "rb") as base:
+            if _write_delta(_iter_lines(source), base, name, depth, delta_path, size // 2):
+                return delta_path
+        return None
+
 
-    def _backup_file(self, file_path: str) -> None:
+    def _store_deferred_backup(self, file_path: str, source: Union[str, bytes], backup_id: str,
+                               started: float) -> None:
         """
-        Create a backup of the specified file with a timestamp.
+        Write a backup queued by _backup_file, on the background thread, and prune old ones.
 
         Args:
-            file_path (str): The path to the file to back up.
+            file_path (str): The path to the original file.
+            source (str or bytes): The staged snapshot of the file, or its contents.
+            backup_id (str): The id taken when the snapshot was captured.
+            started (float): time.perf_counter() value taken when the backup began.
 
         Returns:
             None
         """
-        if os.path.exists(file_path):
-            # Create a backup directory if it doesn't exist
-            backup_dir = self._BACKUP_FOLDER_NAME
-            if not os.path.exists(backup_dir):
-                os.makedirs(backup_dir)
+        try:
+            self._store_backup(file_path, source, backup_id, started, True, staged=isinstance(source, str))
+        except Exception as e:
+            self._log_failure("backup", file_path, started, "Failed to create backup for '%s': %s", file_path, e)
+        finally:
+            if isinstance(source, str):
+                with contextlib.suppress(OSError):
+                    os.remove(source)
 
-            # Generate a timestamp for the backup file name
-            timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-            backup_path = os.path.join(backup_dir, f"{os.path.basename(file_path)}.{timestamp}.bak")
 
-            # Use shutil.copy to copy the file
-            try:
-                shutil.copy(file_path, backup_path)
-                Logger.info(f"Backup created at: '{backup_path}'")
+    def list_backups(self, file_path: str) -> List[str]:
+        """
+        List the backups of a file, newest first.
+
+        Args:
+            file_path (str): The path to the original file.
+
+        Returns:
+            list of str: The backup names, usable with restore_backup.
+        """
+        return [name for name, _ in self._backups_newest_first(file_path)]
+
+
+    def restore_backup(self, file_path: str, which: Union[int, str] = 0) -> bool:
+        """
+        Restores a file from one of its backups.
 
-                # Manage the number of backups
-                self._manage_backups(backup_dir, os.path.basename(file_path))
+        The backup is decompressed in a stream directly into an atomic replacement
+        of the file and checked against the digest stored in its name. The current
+        file is backed up first, so a restore can itself be undone.
+
+        Args:
+            file_path (str): The path to the file to restore.
+            which (int or str): The backup to restore, either its position in
+                list_backups (0 is the newest) or its name.
+
+        Returns:
+            bool: True if the file was restored, False otherwise.
+        """
+        started = time.perf_counter()
+        with self._locks.write(file_path):
+            try:
+                with self._file_lock(file_path, shared=False):
+                    name, digest = self._find_backup(file_path, which)
+                    backup_path = os.path.join(self._backup_dir_for(file_path), name)
+                    # Opened before backing up the current file, which may prune it
+                    with contextlib.ExitStack() as stack:
+                        if self._pack is not None:
+                            chunks = self._pack.open_entry(os.path.dirname(backup_path), os.path.basename(file_path),
+                                                           name, stack)
+                        else:
+                            chunks = self._open_backup(backup_path, stack)
+                        self._backup_file(file_path)
+                        self._restore_from(file_path, chunks, backup_path, digest)
+                self._log_op("restore_backup", file_path, started, "Restored '%s' from backup '%s'", file_path,
+                             backup_path)
+                return True
             except Exception as e:
-                Logger.error(f"Failed to create backup for '{file_path}': {e}")
+                self._log_failure("restore_backup", file_path, started,
+                                  "An error occurred while restoring '%s' from backup: %s", file_path, e)
+                return False
+            finally:
+                self._invalidate_cache(file_path)
+
+
+    def _compact_pack(self, backup_dir: str, file_name: str) -> None:
+        """
+        Drop the snapshots of a backup pack beyond the retention limit.
+
+        Args:
+            backup_dir (str): The backup folder of the file.
+            file_name (str): The name of the original file.
+
+        Returns:
+            None
+        """
+        try:
+            dropped = self._pack.compact(backup_dir, file_name, self._MAX_BACKUPS)
+            if dropped:
+                Logger.info("Compacted backup pack of '%s', dropped %d old snapshots", file_name, dropped)
+        except Exception as e:
+            Logger.error("Failed to compact the backup pack of '%s': %s", file_name, e)
+
+
+    def _backups_newest_first(self, file_path: str) -> List[Tuple[str, Optional[str]]]:
+        """
+        List the backups of a file from its folder or pack, newest first.
+
+        Args:
+            file_path (str): The path to the original file.
+
+        Returns:
+            list of tuple: (backup name, content digest) of each backup.
+        """
+        backup_dir = self._backup_dir_for(file_path)
+        if not os.path.isdir(backup_dir):
+            return []
+        if self._pack is not None:
+            # Snapshots beyond retention are hidden until compaction drops them
+            backups = self._pack.entries(backup_dir, os.path.basename(file_path))[-self._MAX_BACKUPS:]
         else:
-            Logger.warn(f"File '{file_path}' does not exist. No backup created.")
+            backups = self._list_backups(backup_dir, os.path.basename(file_path))
+        return [(name, digest) for _, name, digest in reversed(backups)]
+
+
+    def _find_backup(self, file_path: str, which: Union[int, str]) -> Tuple[str, Optional[str]]:
+        """
+        Pick a backup of a file by position or name.
+
+        Args:
+            file_path (str): The path to the original file.
+            which (int or str): The position in list_backups (0 is the newest) or
+                the name of the backup.
+
+        Returns:
+            tuple: The backup name and its content digest.
+
+        Raises:
+            LookupError: If there is no such backup.
+        """
+        backups = self._backups_newest_first(file_path)
+        if isinstance(which, int):
+            if not 0 <= which < len(backups):
+                raise LookupError(f"No backup number {which}, '{file_path}' has {len(backups)} backups")
+            return backups[which]
+        for name, digest in backups:
+            if name == which:
+                return name, digest
+        raise LookupError(f"No backup named '{which}' for '{file_path}'")
+
+
+    def _open_backup(self, backup_path: str, stack: contextlib.ExitStack) -> Iterator[bytes]:
+        """
+        Open a backup, and the base it was delta-encoded against, for streaming.
+
+        Args:
+            backup_path (str): The path to the backup.
+            stack (ExitStack): Closes the opened files.
+
+        Returns:
+            iterator of bytes: The chunks of the original file contents.
+
+        Raises:
+            ValueError: If the header of a delta is malformed.
+        """
+        backup = stack.enter_context(open(backup_path, "rb"))
+        if not backup_path.endswith(_DELTA_SUFFIX):
+            return _iter_backup_chunks(backup, _COMPRESSED_SUFFIXES.get(os.path.splitext(backup_path)[1]))
+        header = self._delta_header(backup)
+        if header is None:
+            raise ValueError(f"Backup '{backup_path}' has a malformed delta header")
+        base = stack.enter_context(open(os.path.join(os.path.dirname(backup_path), header[0]), "rb"))
+        return _iter_delta_chunks(backup, base)
+
+
+    @staticmethod
+    def _delta_header(delta: IO[bytes]) -> Optional[Tuple[str, int]]:
+        """
+        Read the full backup a delta is encoded against, and its depth, from its header.
+
+        Args:
+            delta (file): The delta, opened in binary mode; left positioned after the header.
+
+        Returns:
+            tuple or None: The name of the base backup and the number of deltas
+            written against it up to this one, or None if the header is malformed.
+        """
+        magic, _, rest = delta.readline().decode(errors="replace").rstrip("\n").partition(" ")
+        depth, _, base_name = rest.partition(" ")
+        if magic != _DELTA_HEADER or not depth.isdigit():
+            return None
+        if not base_name or os.path.basename(base_name) != base_name:
+            return None
+        return base_name, int(depth)
+
+
+    def _restore_from(self, file_path: str, chunks: Iterable[bytes], backup_path: str,
+                      expected: Optional[str]) -> None:
+        """
+        Atomically replace a file with the contents of a backup, checking their digest.
+
+        Args:
+            file_path (str): The path to the file to restore.
+            chunks (iterable of bytes): The contents of the backup.
+            backup_path (str): The path to the backup, for error messages.
+            expected (str, optional): The digest the contents must have, None to
+                skip the check.
+
+        Returns:
+            None
+
+        Raises:
+            ValueError: If the contents do not match the digest, in which case the
+                file is left untouched.
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        with self._atomic_open(file_path, "wb") as f:
+            for chunk in chunks:
+                digest.update(chunk)
+                f.write(chunk)
+            if expected is not None and digest.hexdigest() != expected:
+                raise ValueError(f"Backup '{backup_path}' does not match its checksum")
+
+
+    def flush_backups(self) -> None:
+        """
+        Wait until every deferred backup has been written and old backups pruned.
+
+        Only needed with async_backups or the pack backup store, e.g. before
+        shutdown or in tests.
+
+        Returns:
+            None
+        """
+        for name in ("config-backups", "config-backup-compaction"):
+            work_queue = self._queues.get(name)
+            if work_queue is not None:
+                work_queue.join()
+
+
+    def _backup_dir_for(self, file_path: str) -> str:
+        """
+        Return the directory holding the backups of the specified file.
+
+        The directory is named after the file name and a hash of its absolute path,
+        so files of the same name in different directories never share backups.
+
+        Args:
+            file_path (str): The path to the original file.
+
+        Returns:
+            str: The per-file subdirectory of the backup folder.
+        """
+        path_digest = hashlib.blake2b(os.fsencode(os.path.abspath(file_path)), digest_size=8).hexdigest()
+        return os.path.join(self._BACKUP_FOLDER_NAME, f"{os.path.basename(file_path)}-{path_digest}")
+
+
+    def _copy_to_backup(self, file_path: str, backup_path: str) -> None:
+        """
+        Create backup_path from file_path using the configured backup strategy.
+
+        Args:
+            file_path (str): The path to the file to back up.
+            backup_path (str): The path of the backup to create.
+
+        Returns:
+            None
+        """
+        if self._backup_strategy == "link":
+            try:
+                os.link(file_path, backup_path)
+                return
+            except OSError:
+                pass
+        elif self._backup_strategy == "reflink":
+            if _reflink(file_path, backup_path):
+                return
+        shutil.copy(file_path, backup_path)
 
 
     def _manage_backups(self, backup_dir: str, file_name: str) -> None:
@@ -51,23 +1799,321 @@ class ConfigManager:
         Manage the number of backup files by deleting the oldest ones.
 
         Args:
-            backup_dir (str): The directory where backups are stored.
+            backup_dir (str): The directory where the backups of the file are stored.
+            file_name (str): The name of the original file.
+
+        Returns:
+            None
+        """
+
+        self._sweep_stale_files(backup_dir, file_name)
+
+        # Packs are rewritten in the background once they hold twice the retained snapshots
+        if self._pack is not None:
+            if len(self._pack.entries(backup_dir, file_name)) > 2 * self._MAX_BACKUPS:
+                compaction_queue = self._worker_queue("config-backup-compaction", 0)
+                if compaction_queue is not None:
+                    compaction_queue.put((self._compact_pack, (backup_dir, file_name)))
+                else:
+                    self._compact_pack(backup_dir, file_name)
+            return
+        self._prune_backup_files(backup_dir, file_name)
+
+
+    def _sweep_stale_files(self, backup_dir: str, file_name: str) -> None:
+        """
+        Remove staged snapshots and temporary files left in a backup folder by an
+        interrupted process, once per folder and instance.
+
+        Only files whose status changed more than _STALE_FILE_AGE seconds ago are
+        removed, so those in use by running writers are kept. The change time is
+        used because a staged link keeps the modification time of the original.
+
+        Args:
+            backup_dir (str): The backup folder of the file.
             file_name (str): The name of the original file.
 
         Returns:
             None
         """
+        if backup_dir in self._swept:
+            return
+        self._swept.add(backup_dir)
+        cutoff = time.time() - _STALE_FILE_AGE
+        with os.scandir(backup_dir) as entries:
+            for entry in entries:
+                name = entry.name
+                if not ((name.startswith(f".{file_name}.") and name.endswith(".pending"))
+                        or (name.startswith(f"{file_name}.") and name.endswith(".tmp"))):
+                    continue
+                with contextlib.suppress(OSError):
+                    if entry.stat().st_ctime < cutoff:
+                        os.remove(entry.path)
+                        Logger.info("Removed stale backup file: '%s'", name)
+
+
+    def _prune_backup_files(self, backup_dir: str, file_name: str) -> None:
+        """
+        Delete the oldest backup files of a file beyond the retention limit.
+
+        Args:
+            backup_dir (str): The directory where the backups of the file are stored.
+            file_name (str): The name of the original file.
 
-        # List all backups for the specific file
-        backups = [f for f in os.listdir(backup_dir)
-                   if f.startswith(file_name) and f.endswith('.bak')]
+        Returns:
+            None
+        """
 
         # If there are more backups than allowed, delete the oldest
-        while len(backups) > self._MAX_BACKUPS:
-            oldest_backup = min(backups, key=lambda x: os.path.getctime(os.path.join(backup_dir, x)))
+        backups = self._list_backups(backup_dir, file_name)
+        excess = max(len(backups) - self._MAX_BACKUPS, 0)
+        if not excess:
+            return
+
+        # Keep the full backups that retained deltas are reconstructed from
+        bases = set()
+        for _, name, _ in backups[excess:]:
+            if name.endswith(_DELTA_SUFFIX):
+                with contextlib.suppress(OSError), open(os.path.join(backup_dir, name), "rb") as delta:
+                    header = self._delta_header(delta)
+                    if header is not None:
+                        bases.add(header[0])
+        for _, oldest_backup, _ in backups[:excess]:
+            if oldest_backup in bases:
+                continue
             os.remove(os.path.join(backup_dir, oldest_backup))
-            Logger.info(f"Deleted old backup: '{oldest_backup}'")
-            backups.remove(oldest_backup)
+            Logger.info("Deleted old backup: '%s'", oldest_backup)
+
+
+    @staticmethod
+    def _list_backups(backup_dir: str, file_name: str) -> List[Tuple[str, str, Optional[str]]]:
+        """
+        List the backups of a file, oldest first.
+
+        Backups are named "<file name>.<backup id>.<digest>.bak", followed by
+        ".gz", ".xz" or ".zz" when compressed or ".delta" when delta-encoded, so
+        they are collected in a single directory pass and ordered by the id in
+        their name instead of stat-ing every file. Backups named after a
+        timestamp, and names without a digest, written by older versions, are
+        still listed; the latter with a digest of None. The digest is that of the
+        uncompressed contents.
+
+        Args:
+            backup_dir (str): The directory where the backups of the file are stored.
+            file_name (str): The name of the original file.
+
+        Returns:
+            list of tuple: (sort key, backup name, content digest) of each backup.
+        """
+        prefix = file_name + "."
+        backups = []
+        with os.scandir(backup_dir) as entries:
+            for entry in entries:
+                name = entry.name
+                stem, bak, suffix = name.rpartition(".bak")
+                if not (name.startswith(prefix) and bak
+                        and (not suffix or suffix == _DELTA_SUFFIX or suffix in _COMPRESSED_SUFFIXES)):
+                    continue
+                backup_id, _, digest = stem[len(prefix):].partition(".")
+                key = _backup_sort_key(backup_id)
+                if key is None:
+                    continue  # Backup of another file sharing the prefix
+                backups.append((key, name, digest or None))
+        backups.sort()
+        return backups
+
+
+    def read_many(self, file_paths: Iterable[str], max_workers: int = 8,
+                  process_threshold: Optional[int] = None) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        """
+        Reads many JSON, XML and CSV files in parallel, dispatching on their extension.
+
+        Files are read on a thread pool. When process_threshold is set, files of at
+        least that many bytes are parsed on a process pool instead, so large
+        CPU-bound parses are not serialized by the GIL. The pool is only started
+        once such a file is found, and its workers are spawned, so scripts calling
+        read_many need an ``if __name__ == "__main__"`` guard. Instead of one log
+        line per file, a single summary line is logged.
+
+        Args:
+            file_paths (iterable of str): The paths to the files to read.
+            max_workers (int): Number of reader threads.
+            process_threshold (int, optional): Size in bytes from which files are
+                parsed in a separate process. Disabled when omitted.
+
+        Returns:
+            tuple: A dict of the contents of every file read successfully and a dict
+            of the error message of every file that failed, both keyed by path.
+        """
+        started = time.perf_counter()
+        file_paths = [os.fspath(file_path) for file_path in file_paths]
+        results, errors = {}, {}
+        process_pool = _LazyProcessPool() if process_threshold is not None else None
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                futures = {}
+                for file_path in file_paths:
+                    kind = _FORMATS.get(os.path.splitext(file_path)[1].lower())
+                    if kind is None:
+                        errors[file_path] = f"Error: The file '{file_path}' has an unsupported extension."
+                        continue
+                    futures[file_path] = (kind, pool.submit(self._read_for_many, kind, file_path,
+                                                            process_pool, process_threshold))
+                for file_path, (kind, future) in futures.items():
+                    try:
+                        results[file_path] = future.result()
+                    except Exception as e:
+                        errors[file_path] = self._read_error_message(kind, file_path, e)
+        finally:
+            if process_pool is not None:
+                process_pool.shutdown()
+
+        duration_ms = round((time.perf_counter() - started) * 1000, 3)
+        if errors:
+            Logger.error("Read %d of %d files, %d failed: %s", len(results), len(file_paths), len(errors),
+                         "; ".join(errors.values()), extra={"op": "read_many", "duration_ms": duration_ms})
+        else:
+            Logger.info("Successfully read %d files", len(results),
+                        extra={"op": "read_many", "duration_ms": duration_ms})
+        return results, errors
+
+
+    def write_many(self, files: Dict[str, Any], max_workers: int = 8) -> Tuple[List[str], Dict[str, str]]:
+        """
+        Writes many JSON, XML and CSV files, dispatching on their extension.
+
+        All files are backed up first, old backups are pruned in a single pass per
+        file (by the background thread with async_backups), and the files are then
+        written in parallel. Every file stays locked from its backup through its
+        write, as with write_json, so no change made in between can escape the
+        backup. A file whose backups cannot be pruned is not written. Paths naming
+        the same file are written once, with the data of the last of them. Instead
+        of one log line per file, a single summary line is logged.
+
+        Args:
+            files (dict): The data to write keyed by file path; dictionaries for JSON
+                and XML files, iterables of dictionaries for CSV files.
+            max_workers (int): Number of writer threads.
+
+        Returns:
+            tuple: The list of paths written successfully and a dict of the error
+            message of every file that failed, keyed by path.
+        """
+        started = time.perf_counter()
+        errors = {}
+        pending = {}
+        aliases = {}  # Absolute path -> the path it was given as
+        for file_path, data in files.items():
+            file_path = os.fspath(file_path)
+            kind = _FORMATS.get(os.path.splitext(file_path)[1].lower())
+            if kind is None:
+                errors[file_path] = f"The file '{file_path}' has an unsupported extension."
+            elif kind == "csv" and (isinstance(data, (str, bytes, dict)) or not isinstance(data, Iterable)):
+                errors[file_path] = f"Excepted iterable of dictionaries but got {type(data)}"
+            elif kind != "csv" and not isinstance(data, dict):
+                errors[file_path] = f"Excepted dictionary object but got {type(data)}"
+            else:
+                key = os.path.abspath(file_path)
+                if key in aliases:
+                    superseded = aliases[key]
+                    errors[superseded] = f"Superseded by '{file_path}', which names the same file."
+                    del pending[superseded]
+                aliases[key] = file_path
+                pending[file_path] = (kind, data)
+
+        with self._locks.write_all(list(pending)), contextlib.ExitStack() as file_locks, \
+                ThreadPoolExecutor(max_workers=max_workers) as pool:
+            # Lock files in a fixed order so concurrent batches cannot deadlock
+            for file_path in sorted(pending, key=os.path.abspath):
+                try:
+                    file_locks.enter_context(self._file_lock(file_path, shared=False))
+                except Exception as e:
+                    errors[file_path] = str(e)
+                    del pending[file_path]
+
+            # Back up every file, then prune each backup folder once
+            backups = {file_path: pool.submit(self._backup_file, file_path, False) for file_path in pending}
+            for file_path, future in backups.items():
+                try:
+                    future.result()
+                except Exception as e:
+                    errors[file_path] = str(e)
+                    del pending[file_path]
+            # The background thread prunes deferred backups itself
+            if not self._async_backups:
+                for file_path in list(pending):
+                    backup_dir = self._backup_dir_for(file_path)
+                    try:
+                        if os.path.isdir(backup_dir):
+                            self._manage_backups(backup_dir, os.path.basename(file_path))
+                    except Exception as e:
+                        errors[file_path] = f"Failed to prune the backups in '{backup_dir}': {e}"
+                        del pending[file_path]
+
+            writes = {file_path: pool.submit(self._write_for_many, kind, file_path, data)
+                      for file_path, (kind, data) in pending.items()}
+            written = []
+            for file_path, future in writes.items():
+                try:
+                    future.result()
+                    written.append(file_path)
+                except Exception as e:
+                    errors[file_path] = str(e)
+
+        duration_ms = round((time.perf_counter() - started) * 1000, 3)
+        if errors:
+            Logger.error("Wrote %d of %d files, %d failed: %s", len(written), len(files), len(errors),
+                         "; ".join(f"'{file_path}': {error}" for file_path, error in errors.items()),
+                         extra={"op": "write_many", "duration_ms": duration_ms})
+        else:
+            Logger.info("Successfully wrote %d files", len(written),
+                        extra={"op": "write_many", "duration_ms": duration_ms})
+        return written, errors
+
+
+    def _write_for_many(self, kind: str, file_path: str, data: Any) -> None:
+        write = {"json": self._write_json_file, "xml": self._write_xml_file, "csv": self._write_csv_file}[kind]
+        try:
+            write(file_path, data)
+        finally:
+            self._invalidate_cache(file_path)
+
+
+    def _read_for_many(self, kind: str, file_path: str, process_pool: Optional[_LazyProcessPool],
+                       process_threshold: Optional[int]) -> Any:
+        parse = {"json": self._parse_json, "xml": self._parse_xml, "csv": self._parse_csv}[kind]
+        with self._locks.read(file_path), self._file_lock(file_path, shared=True):
+            if process_pool is not None and os.path.getsize(file_path) >= process_threshold:
+                parse = functools.partial(self._parse_in_process, process_pool, kind)
+            data, _, _ = self._read_cached(kind, file_path, parse)
+        return data
+
+
+    def _parse_in_process(self, process_pool: _LazyProcessPool, kind: str, file_path: str) -> Any:
+        return process_pool.submit(_parse_in_worker, kind, file_path, self._json.name)
+
+
+    def _read_error_message(self, kind: str, file_path: str, error: Exception) -> str:
+        """
+        Return the message the single-file reader would log for a failed read.
+
+        Args:
+            kind (str): The format of the file.
+            file_path (str): The path to the file.
+            error (Exception): The exception raised by the read.
+
+        Returns:
+            str: The error message.
+        """
+        if isinstance(error, FileNotFoundError):
+            return f"Error: The file '{file_path}' was not found."
+        if kind == "json" and isinstance(error, (self._json.decode_error, json.JSONDecodeError)):
+            return f"Error: The file '{file_path}' is not a valid JSON file."
+        if kind == "xml" and isinstance(error, ET.ParseError):
+            return f"Error: The file '{file_path}' is not a valid XML file."
+        if kind == "csv":
+            return f"Error: An error occurred while reading the CSV file: {error}"
+        return f"Error: {error}"
 
 
     def read_json(self, file_path: str) -> Dict:
@@ -80,19 +2126,30 @@ class ConfigManager:
         Returns:
             dict: The contents of the JSON file.
         """
+        started = time.perf_counter()
         try:
-            with open(file_path, "r") as file:
-                data = json.load(file)
-                Logger.info(f"Successfully read JSON file: '{file_path}'")
-                return data
+            with self._locks.read(file_path), self._file_lock(file_path, shared=True):
+                data, cache_hit, size = self._read_cached("json", file_path, self._parse_json)
+            self._log_op("read_json", file_path, started, "Successfully read JSON file: '%s'", file_path, size=size,
+                         cache_hit=cache_hit)
+            return data
         except FileNotFoundError:
-            Logger.error(f"Error: The file '{file_path}' was not found.")
+            self._log_failure("read_json", file_path, started, "Error: The file '%s' was not found.", file_path)
+            return {}
+        except self._json.decode_error:
+            self._log_failure("read_json", file_path, started,
+                              "Error: The file '%s' is not a valid JSON file.", file_path)
             return {}
-        except json.JSONDecodeError:
-            Logger.error(f"Error: The file '{file_path}' is not a valid JSON file.")
+        except TimeoutError as e:
+            self._log_failure("read_json", file_path, started, "Error: %s", e)
             return {}
 
 
+    def _parse_json(self, file_path: str) -> Dict:
+        with open(file_path, "rb") as file:
+            return self._json.loads(file.read())
+
+
     def write_json(self, file_path: str, data: Dict) -> None:
         """
         Writes a dictionary to a JSON file.
@@ -107,42 +2164,119 @@ class ConfigManager:
         Raises:
             TypeError: If the provided data is not a dictionary.
         """
+        started = time.perf_counter()
         if not isinstance(data, dict):
-            Logger.error(f"An error occurred while writing JSON to '{file_path}': "
-                         f"Excepted dictionary object but got {type(data)}")
+            self._log_failure("write_json", file_path, started,
+                              "An error occurred while writing JSON to '%s': "
+                              "Excepted dictionary object but got %s", file_path, type(data))
             raise TypeError("data must be a dictionary")
-        # Create a backup of the file before writing
-        self._backup_file(file_path)
-        try:
-            with open(file_path, 'w') as f:
-                json.dump(data, f, indent=4)
-                Logger.info(f"Successfully wrote JSON data to: '{file_path}'")
-        except Exception as e:
-            Logger.error(f"An error occurred while writing JSON to '{file_path}': {e}")
+        with self._locks.write(file_path):
+            try:
+                with self._file_lock(file_path, shared=False):
+                    # Create a backup of the file before writing
+                    self._backup_file(file_path)
+                    size = self._write_json_file(file_path, data)
+                self._log_op("write_json", file_path, started, "Successfully wrote JSON data to: '%s'", file_path,
+                             size=size)
+            except Exception as e:
+                self._log_failure("write_json", file_path, started,
+                                  "An error occurred while writing JSON to '%s': %s", file_path, e)
+            finally:
+                self._invalidate_cache(file_path)
 
 
-    def read_xml(self, file_path: str) -> Dict:
+    def _write_json_file(self, file_path: str, data: Dict) -> int:
+        payload = self._json.dumps(data, self._json_compact)
+        with self._atomic_open(file_path, 'wb') as f:
+            f.write(payload)
+        return len(payload)
+
+
+    def read_xml(self, file_path: str, incremental: bool = False) -> Dict:
         """
         Reads an XML file and returns its contents as a dictionary.
 
         Args:
             file_path (str): The path to the XML file.
+            incremental (bool): Parse the file with iterparse, discarding each child
+                of the root as soon as it has been read, instead of building the
+                whole tree first. The result is the same.
 
         Returns:
             dict: The contents of the XML file.
         """
+        started = time.perf_counter()
+        parse = self._parse_xml_incremental if incremental else self._parse_xml
         try:
-            tree = ET.parse(file_path)
-            root = tree.getroot()
-            config_data = {child.tag: child.text for child in root}
-            Logger.info(f"Successfully read XML file: '{file_path}'")
+            with self._locks.read(file_path), self._file_lock(file_path, shared=True):
+                config_data, cache_hit, size = self._read_cached("xml", file_path, parse)
+            self._log_op("read_xml", file_path, started, "Successfully read XML file: '%s'", file_path, size=size,
+                         cache_hit=cache_hit)
             return config_data
         except FileNotFoundError:
-            Logger.error(f"Error: The file '{file_path}' was not found.")
+            self._log_failure("read_xml", file_path, started, "Error: The file '%s' was not found.", file_path)
             return {}
         except ET.ParseError:
-            Logger.error(f"Error: The file '{file_path}' is not a valid XML file.")
+            self._log_failure("read_xml", file_path, started,
+                              "Error: The file '%s' is not a valid XML file.", file_path)
             return {}
+        except TimeoutError as e:
+            self._log_failure("read_xml", file_path, started, "Error: %s", e)
+            return {}
+
+
+    def iter_xml(self, file_path: str) -> Iterator[Tuple[str, Optional[str]]]:
+        """
+        Incrementally reads an XML file, yielding the root's children as they close.
+
+        Each child is released as soon as it has been yielded, so memory use does
+        not grow with the size of the document. Errors are logged like in read_xml
+        and end the iteration early.
+
+        Args:
+            file_path (str): The path to the XML file.
+
+        Yields:
+            tuple: (tag, text) of each child element of the root.
+        """
+        started = time.perf_counter()
+        try:
+            yield from self._iter_xml_elements(file_path)
+            self._log_op("iter_xml", file_path, started, "Successfully streamed XML file: '%s'", file_path)
+        except FileNotFoundError:
+            self._log_failure("iter_xml", file_path, started, "Error: The file '%s' was not found.", file_path)
+        except ET.ParseError:
+            self._log_failure("iter_xml", file_path, started,
+                              "Error: The file '%s' is not a valid XML file.", file_path)
+
+
+    @staticmethod
+    def _parse_xml(file_path: str) -> Dict:
+        tree = ET.parse(file_path)
+        root = tree.getroot()
+        return {child.tag: child.text for child in root}
+
+
+    @staticmethod
+    def _parse_xml_incremental(file_path: str) -> Dict:
+        return dict(ConfigManager._iter_xml_elements(file_path))
+
+
+    @staticmethod
+    def _iter_xml_elements(file_path: str) -> Iterator[Tuple[str, Optional[str]]]:
+        root = None
+        depth = 0
+        for event, elem in ET.iterparse(file_path, events=("start", "end")):
+            if event == "start":
+                if root is None:
+                    root = elem
+                depth += 1
+                continue
+            depth -= 1
+            if depth == 1:
+                yield elem.tag, elem.text
+                # Drop the finished child so the tree never holds more than one
+                root.clear()
 
 
     def write_xml(self, file_path: str, data: Dict) -> None:
@@ -159,22 +2293,36 @@ class ConfigManager:
         Raises:
             TypeError: If the provided data is not a dictionary.
         """
+        started = time.perf_counter()
         if not isinstance(data, dict):
-            Logger.error(f"An error occurred while writing XML to '{file_path}': "
-                         f"Excepted dictionary object but got {type(data)}")
+            self._log_failure("write_xml", file_path, started,
+                              "An error occurred while writing XML to '%s': "
+                              "Excepted dictionary object but got %s", file_path, type(data))
             raise TypeError("data must be a dictionary")
-        # Create a backup of the file before writing
-        self._backup_file(file_path)
-        try:
-            root = ET.Element("config")
-            for key, value in data.items():
-                child = ET.SubElement(root, key)
-                child.text = value
-            tree = ET.ElementTree(root)
-            tree.write(file_path)
-            Logger.info(f"Successfully wrote XML data to: '{file_path}'")
-        except Exception as e:
-            Logger.error(f"An error occurred while writing XML to '{file_path}': {e}")
+        with self._locks.write(file_path):
+            try:
+                with self._file_lock(file_path, shared=False):
+                    # Create a backup of the file before writing
+                    self._backup_file(file_path)
+                    size = self._write_xml_file(file_path, data)
+                self._log_op("write_xml", file_path, started, "Successfully wrote XML data to: '%s'", file_path,
+                             size=size)
+            except Exception as e:
+                self._log_failure("write_xml", file_path, started,
+                                  "An error occurred while writing XML to '%s': %s", file_path, e)
+            finally:
+                self._invalidate_cache(file_path)
+
+
+    def _write_xml_file(self, file_path: str, data: Dict) -> int:
+        root = ET.Element("config")
+        for key, value in data.items():
+            child = ET.SubElement(root, key)
+            child.text = value
+        tree = ET.ElementTree(root)
+        with self._atomic_open(file_path, 'wb') as f:
+            tree.write(f)
+            return f.tell()
 
 
     def read_csv(self, file_path: str) -> List[Dict]:
@@ -187,48 +2335,205 @@ class ConfigManager:
         Returns:
             list of dict: The contents of the CSV file.
         """
+        started = time.perf_counter()
         try:
-            with open(file_path, "r") as file:
-                reader = csv.DictReader(file)
-                data = [row for row in reader]
-                Logger.info(f"Successfully read CSV file: '{file_path}'")
-                return data
+            with self._locks.read(file_path), self._file_lock(file_path, shared=True):
+                data, cache_hit, size = self._read_cached("csv", file_path, self._parse_csv)
+            self._log_op("read_csv", file_path, started, "Successfully read CSV file: '%s'", file_path, size=size,
+                         rows=len(data), cache_hit=cache_hit)
+            return data
         except FileNotFoundError:
-            Logger.error(f"Error: The file '{file_path}' was not found.")
+            self._log_failure("read_csv", file_path, started, "Error: The file '%s' was not found.", file_path)
             return []
         except Exception as e:
-            Logger.error(f"Error: An error occurred while reading the CSV file: {e}")
+            self._log_failure("read_csv", file_path, started,
+                              "Error: An error occurred while reading the CSV file: %s", e)
             return []
 
 
-    def write_csv(self, file_path: str, data: List[Dict]) -> None:
+    @staticmethod
+    def _parse_csv(file_path: str) -> List[Dict]:
+        with open(file_path, "r") as file:
+            reader = csv.DictReader(file)
+            return [row for row in reader]
+
+
+    def iter_csv(self, file_path: str, columns: Optional[Iterable[str]] = None,
+                 where: Optional[Callable[[Dict], bool]] = None) -> Iterator[Dict]:
+        """
+        Lazily reads a CSV file, yielding one dictionary per row.
+
+        Only the requested columns are turned into dictionary entries, and rows
+        rejected by the predicate are dropped before they reach the caller. Errors
+        are logged like in read_csv and end the iteration early.
+
+        Args:
+            file_path (str): The path to the CSV file.
+            columns (iterable of str, optional): The columns to keep. All columns
+                are kept when omitted.
+            where (callable, optional): Predicate called with each projected row;
+                rows for which it returns a falsy value are skipped.
+
+        Yields:
+            dict: The (projected) rows of the CSV file.
+        """
+        started = time.perf_counter()
+        try:
+            rows = 0
+            with open(file_path, "r", newline="") as file:
+                for row in self._iter_csv_rows(file, columns, where):
+                    rows += 1
+                    yield row
+            self._log_op("iter_csv", file_path, started, "Successfully streamed CSV file: '%s'", file_path,
+                         rows=rows)
+        except FileNotFoundError:
+            self._log_failure("iter_csv", file_path, started, "Error: The file '%s' was not found.", file_path)
+        except Exception as e:
+            self._log_failure("iter_csv", file_path, started,
+                              "Error: An error occurred while reading the CSV file: %s", e)
+
+
+    @contextlib.contextmanager
+    def open_csv(self, file_path: str, columns: Optional[Iterable[str]] = None,
+                 where: Optional[Callable[[Dict], bool]] = None) -> Iterator[Iterator[Dict]]:
+        """
+        Context-managed variant of iter_csv that closes the file on exit.
+
+        Args:
+            file_path (str): The path to the CSV file.
+            columns (iterable of str, optional): The columns to keep.
+            where (callable, optional): Predicate used to filter the projected rows.
+
+        Yields:
+            iterator of dict: The row iterator, valid until the block exits.
+        """
+        rows = self.iter_csv(file_path, columns, where)
+        try:
+            yield rows
+        finally:
+            rows.close()
+
+
+    @staticmethod
+    def _iter_csv_rows(file, columns: Optional[Iterable[str]],
+                       where: Optional[Callable[[Dict], bool]]) -> Iterator[Dict]:
+        reader = csv.reader(file)
+        header = next(reader, None)
+        if header is None:
+            return
+        if columns is None:
+            fields = header
+            indexes = range(len(header))
+        else:
+            fields = list(columns)
+            missing = [name for name in fields if name not in header]
+            if missing:
+                raise KeyError(f"Unknown CSV columns: {missing}")
+            indexes = [header.index(name) for name in fields]
+        width = len(header)
+        for values in reader:
+            if not values:
+                continue
+            # Mirror csv.DictReader: short rows are padded with None and, when
+            # every column is kept, extra values are collected under None.
+            if len(values) < width:
+                values = values + [None] * (width - len(values))
+            row = {name: values[i] for name, i in zip(fields, indexes)}
+            if columns is None and len(values) > width:
+                row[None] = values[width:]
+            if where is None or where(row):
+                yield row
+
+
+    def write_csv(self, file_path: str, data: Iterable[Dict], fieldnames: Optional[Iterable[str]] = None,
+                  chunk_size: int = 1000, flush_interval: int = 0) -> None:
         """
-        Writes a list of dictionaries to a CSV file.
+        Writes an iterable of dictionaries to a CSV file.
+
+        Rows are consumed lazily and written in chunks, so generators can be
+        exported in constant memory.
 
         Args:
             file_path (str): The path to the CSV file to write to.
-            data (list of dict): The list of dictionaries containing data to write.
+            data (iterable of dict): The rows to write, e.g. a list or a generator.
+            fieldnames (iterable of str, optional): The CSV header. Defaults to the
+                keys of the first row.
+            chunk_size (int): Number of rows handed to the CSV writer at a time.
+            flush_interval (int): Flush the file every this many rows, even in the
+                middle of a chunk. Disabled when 0.
 
         Returns:
             None
 
         Raises:
-            TypeError: If the provided data is not a list.
-        """
-        if not isinstance(data, list):
-            Logger.error(f"An error occurred while writing CSV to '{file_path}': "
-                         f"Excepted dictionary object but got {type(data)}")
-            raise TypeError("data must be a list")
-        # Create a backup of the file before writing
-        self._backup_file(file_path)
-        try:
-            with open(file_path, mode='w', newline='') as f:
-                if data:
-                    writer = csv.DictWriter(f, fieldnames=data[0].keys())
-                    writer.writeheader()
-                    writer.writerows(data)
-                    Logger.info(f"Successfully wrote CSV data to: '{file_path}'")
-                else:
+            TypeError: If the provided data is not an iterable of rows.
+        """
+        started = time.perf_counter()
+        if isinstance(data, (str, bytes, dict)) or not isinstance(data, Iterable):
+            self._log_failure("write_csv", file_path, started,
+                              "An error occurred while writing CSV to '%s': "
+                              "Excepted iterable of dictionaries but got %s", file_path, type(data))
+            raise TypeError("data must be an iterable of dictionaries")
+        with self._locks.write(file_path):
+            try:
+                with self._file_lock(file_path, shared=False):
+                    # Create a backup of the file before writing
+                    self._backup_file(file_path)
+                    written = self._write_csv_file(file_path, data, fieldnames, chunk_size, flush_interval)
+                if written is not None:
+                    self._log_op("write_csv", file_path, started, "Successfully wrote CSV data to: '%s'", file_path,
+                                 rows=written[0], size=written[1])
+            except Exception as e:
+                self._log_failure("write_csv", file_path, started,
+                                  "An error occurred while writing CSV to '%s': %s", file_path, e)
+            finally:
+                self._invalidate_cache(file_path)
+
+
+    def _write_csv_file(self, file_path: str, data: Iterable[Dict], fieldnames: Optional[Iterable[str]] = None,
+                        chunk_size: int = 1000, flush_interval: int = 0) -> Optional[Tuple[int, int]]:
+        rows = iter(data)
+        with self._atomic_open(file_path, 'w', newline='', buffering=_CSV_WRITE_BUFFER_SIZE) as f:
+            if fieldnames is None:
+                first = next(rows, None)
+                if first is None:
                     Logger.warn("No data to write to CSV.")
-        except Exception as e:
-            Logger.error(f"An error occurred while writing CSV to '{file_path}': {e}")
+                    return None
+                fieldnames = first.keys()
+                rows = itertools.chain([first], rows)
+            writer = csv.DictWriter(f, fieldnames=list(fieldnames))
+            writer.writeheader()
+            written = flushed = 0
+            chunk = []
+            for row in rows:
+                chunk.append(row)
+                # Checked on every row, so rows from a slow producer are flushed on time
+                due = flush_interval and written + len(chunk) - flushed >= flush_interval
+                if len(chunk) >= chunk_size or due:
+                    writer.writerows(chunk)
+                    written += len(chunk)
+                    chunk = []
+                if due:
+                    f.flush()
+                    flushed = written
+            writer.writerows(chunk)
+            written += len(chunk)
+            # The file position after a flush is the number of bytes written
+            f.flush()
+            return written, f.buffer.tell()
+
+
+def _parse_in_worker(kind: str, file_path: str, json_backend: str) -> Any:
+    """
+    Parse a file in a worker process of ConfigManager.read_many.
+
+    Args:
+        kind (str): The format of the file: "json", "xml" or "csv".
+        file_path (str): The path to the file.
+        json_backend (str): The name of the JSON backend to use.
+
+    Returns:
+        The parsed contents of the file.
+    """
+    manager = ConfigManager(json_backend=json_backend)
+    return {"json": manager._parse_json, "xml": manager._parse_xml, "csv": manager._parse_csv}[kind](file_path)
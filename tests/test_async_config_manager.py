@@ -0,0 +1,95 @@
+import asyncio
+import threading
+import time
+from src.async_config_manager import AsyncConfigManager
+from src.config_manager import ConfigManager
+
+
+def test_async_round_trip(tmp_path):
+    manager = AsyncConfigManager()
+    json_file = str(tmp_path / "config.json")
+    csv_file = str(tmp_path / "config.csv")
+    xml_file = str(tmp_path / "config.xml")
+
+    async def main():
+        await manager.write_json(json_file, {"name": "Test"})
+        await manager.write_csv(csv_file, [{"name": "Test"}])
+        await manager.write_xml(xml_file, {"name": "Test"})
+        return await asyncio.gather(manager.read_json(json_file), manager.read_csv(csv_file),
+                                    manager.read_xml(xml_file, incremental=True))
+
+    assert asyncio.run(main()) == [{"name": "Test"}, [{"name": "Test"}], {"name": "Test"}]
+
+
+def test_concurrent_reads_of_same_file_are_coalesced(tmp_path, monkeypatch):
+    sync_manager = ConfigManager()
+    calls = []
+
+    def slow_read(file_path):
+        calls.append(file_path)
+        time.sleep(0.05)
+        return {"name": "Test"}
+
+    monkeypatch.setattr(sync_manager, "read_json", slow_read)
+    manager = AsyncConfigManager(sync_manager)
+
+    async def main():
+        return await asyncio.gather(*[manager.read_json(str(tmp_path / "config.json")) for _ in range(5)])
+
+    assert asyncio.run(main()) == [{"name": "Test"}] * 5
+    assert len(calls) == 1
+
+
+def test_semaphore_bounds_operations_in_flight(tmp_path, monkeypatch):
+    sync_manager = ConfigManager()
+    lock = threading.Lock()
+    running = []
+    peak = []
+
+    def slow_write(file_path, data):
+        with lock:
+            running.append(file_path)
+            peak.append(len(running))
+        time.sleep(0.02)
+        with lock:
+            running.remove(file_path)
+
+    monkeypatch.setattr(sync_manager, "write_json", slow_write)
+    manager = AsyncConfigManager(sync_manager, max_concurrency=2)
+
+    async def main():
+        await asyncio.gather(*[manager.write_json(str(tmp_path / f"config{i}.json"), {}) for i in range(8)])
+
+    asyncio.run(main())
+    assert max(peak) <= 2
+
+
+def test_coalesced_reads_return_separate_copies(tmp_path, monkeypatch):
+    sync_manager = ConfigManager()
+
+    def slow_read(file_path):
+        time.sleep(0.05)
+        return {"nested": {"name": "Test"}}
+
+    monkeypatch.setattr(sync_manager, "read_json", slow_read)
+    manager = AsyncConfigManager(sync_manager)
+
+    async def main():
+        return await asyncio.gather(*[manager.read_json(str(tmp_path / "config.json")) for _ in range(3)])
+
+    results = asyncio.run(main())
+    results[0]["nested"]["poison"] = True
+    assert results[1:] == [{"nested": {"name": "Test"}}] * 2
+    assert results[1] is not results[2]
+
+
+def test_manager_can_be_used_from_several_event_loops(tmp_path, monkeypatch):
+    sync_manager = ConfigManager()
+    monkeypatch.setattr(sync_manager, "write_json", lambda file_path, data: time.sleep(0.01))
+    manager = AsyncConfigManager(sync_manager, max_concurrency=1)
+
+    async def main():
+        await asyncio.gather(*[manager.write_json(str(tmp_path / f"config{i}.json"), {}) for i in range(3)])
+
+    asyncio.run(main())
+    asyncio.run(main())
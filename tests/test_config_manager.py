@@ -2,8 +2,15 @@ import pytest
 import json
 import xml.etree.ElementTree as ET
 import csv
-from src.config_manager import ConfigManager
+import gc
+from src.config_manager import ConfigManager, _PathLocks
 import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+import weakref
 
 
 # Define constants for test filenames
@@ -12,6 +19,10 @@ TEST_XML = 'config.xml'
 TEST_CSV = 'config.csv'
 
 
+def backup_dir_of(file_path):
+    return ConfigManager()._backup_dir_for(file_path)
+
+
 @pytest.fixture()
 def config_manager():
     return ConfigManager()
@@ -28,9 +39,7 @@ def cleanup_files():
     # Clean up backup files
     backup_dir = 'config-backups'
     if os.path.exists(backup_dir):
-        for backup_file in os.listdir(backup_dir):
-            os.remove(os.path.join(backup_dir, backup_file))
-        os.rmdir(backup_dir)  # Remove the backup directory if empty
+        shutil.rmtree(backup_dir)
 
 
 def test_can_instantiate_config_manager() -> None:
@@ -180,3 +189,912 @@ def test_backup_management_on_write_csv(config_manager):
     backup_dir = 'config-backups'
     assert os.path.exists(backup_dir)
     assert len(os.listdir(backup_dir)) == 1  # Should have one backup after first write
+
+
+def test_read_cache_serves_unchanged_file_without_parsing(tmp_path, monkeypatch):
+    json_file = tmp_path / "config.json"
+    json_file.write_text(json.dumps({"name": "Test"}))
+    manager = ConfigManager(cache_size=8)
+    calls = []
+    parse = manager._parse_json
+    monkeypatch.setattr(manager, "_parse_json", lambda p: calls.append(p) or parse(p))
+    assert manager.read_json(json_file) == {"name": "Test"}
+    assert manager.read_json(json_file) == {"name": "Test"}
+    assert len(calls) == 1
+
+
+def test_read_cache_is_refreshed_after_write(tmp_path):
+    json_file = str(tmp_path / "config.json")
+    manager = ConfigManager(cache_size=8)
+    manager.write_json(json_file, {"version": "1.0"})
+    assert manager.read_json(json_file) == {"version": "1.0"}
+    manager.write_json(json_file, {"version": "2.0"})
+    assert manager.read_json(json_file) == {"version": "2.0"}
+
+
+def test_read_cache_returns_copies(tmp_path):
+    manager = ConfigManager(cache_size=8)
+    json_file = str(tmp_path / "config.json")
+    xml_file = str(tmp_path / "config.xml")
+    csv_file = str(tmp_path / "config.csv")
+    manager.write_json(json_file, {"nested": {"name": "Test"}})
+    manager.write_xml(xml_file, {"name": "Test"})
+    manager.write_csv(csv_file, [{"name": "Test"}])
+    for _ in range(2):
+        manager.read_json(json_file)["nested"]["poison"] = True
+        manager.read_xml(xml_file)["poison"] = "1"
+        manager.read_csv(csv_file)[0]["poison"] = "1"
+    assert manager.read_json(json_file) == {"nested": {"name": "Test"}}
+    assert manager.read_xml(xml_file) == {"name": "Test"}
+    assert manager.read_csv(csv_file) == [{"name": "Test"}]
+
+
+def test_read_cache_hit_is_faster_than_uncached_read(tmp_path):
+    json_file = str(tmp_path / "config.json")
+    data = {f"key{i}": {"name": f"Test{i}", "values": list(range(10)), "enabled": True} for i in range(5000)}
+    with open(json_file, "w") as f:
+        json.dump(data, f, indent=4)
+    uncached, cached = ConfigManager(), ConfigManager(cache_size=8)
+    assert cached.read_json(json_file) == data
+
+    def best_of(read):
+        timings = []
+        for _ in range(5):
+            started = time.perf_counter()
+            read(json_file)
+            timings.append(time.perf_counter() - started)
+        return min(timings)
+
+    assert best_of(cached.read_json) < best_of(uncached.read_json)
+
+
+def test_cached_read_logs_size_without_second_stat(tmp_path, monkeypatch, caplog):
+    json_file = tmp_path / "config.json"
+    json_file.write_text(json.dumps({"name": "Test"}))
+    manager = ConfigManager(cache_size=8)
+    calls = []
+    monkeypatch.setattr(os.path, "getsize", lambda p: calls.append(p))
+    with caplog.at_level("INFO"):
+        manager.read_json(json_file)
+        manager.read_json(json_file)
+    assert calls == []
+    assert [record.bytes for record in caplog.records if hasattr(record, "op")] == [json_file.stat().st_size] * 2
+
+
+def test_read_cache_evicts_least_recently_used(tmp_path):
+    manager = ConfigManager(cache_size=2)
+    paths = []
+    for i in range(3):
+        csv_file = tmp_path / f"config{i}.csv"
+        csv_file.write_text(f"name\nTest{i}\n")
+        paths.append(csv_file)
+        manager.read_csv(csv_file)
+    assert len(manager._cache._entries) == 2
+    assert ("csv", os.path.abspath(paths[0])) not in manager._cache._entries
+
+
+def test_iter_csv_yields_rows_lazily(tmp_path):
+    csv_file = tmp_path / "config.csv"
+    csv_file.write_text("name,version\nTest,1.0\nExample,2.0\n")
+    manager = ConfigManager()
+    rows = manager.iter_csv(csv_file)
+    assert next(rows) == {"name": "Test", "version": "1.0"}
+    assert list(rows) == [{"name": "Example", "version": "2.0"}]
+    assert list(manager.iter_csv(csv_file)) == manager.read_csv(csv_file)
+
+
+def test_iter_csv_projects_and_filters_rows(tmp_path):
+    csv_file = tmp_path / "config.csv"
+    csv_file.write_text("name,version,owner\nTest,1.0,a\nExample,2.0,b\n")
+    manager = ConfigManager()
+    rows = manager.iter_csv(csv_file, columns=["name"], where=lambda row: row["name"] != "Test")
+    assert list(rows) == [{"name": "Example"}]
+
+
+def test_iter_csv_missing_file_yields_nothing(tmp_path):
+    manager = ConfigManager()
+    assert list(manager.iter_csv(tmp_path / "missing.csv")) == []
+
+
+def test_open_csv_closes_file_on_exit(tmp_path):
+    csv_file = tmp_path / "config.csv"
+    csv_file.write_text("name\nTest\nExample\n")
+    manager = ConfigManager()
+    with manager.open_csv(csv_file) as rows:
+        assert next(rows) == {"name": "Test"}
+    assert list(rows) == []
+
+
+def test_write_csv_accepts_generator(tmp_path, config_manager):
+    csv_file = tmp_path / "config.csv"
+    rows = ({"name": f"Test{i}", "version": str(i)} for i in range(2500))
+    config_manager.write_csv(csv_file, rows, chunk_size=100, flush_interval=1000)
+    loaded_data = config_manager.read_csv(csv_file)
+    assert len(loaded_data) == 2500
+    assert loaded_data[-1] == {"name": "Test2499", "version": "2499"}
+
+
+def test_write_csv_flushes_within_a_chunk(tmp_path, config_manager):
+    csv_file = tmp_path / "config.csv"
+    flushed = []
+
+    def slow_rows():
+        for i in range(3):
+            # Rows handed over so far must be on disk once flush_interval of them are
+            flushed.append(sum(os.path.getsize(path) for path in tmp_path.glob(".config.csv.*.tmp")))
+            yield {"name": f"Test{i}"}
+
+    config_manager.write_csv(csv_file, slow_rows(), chunk_size=1000, flush_interval=1)
+    assert flushed[1] == len("name\r\nTest0\r\n")
+    assert flushed[2] == len("name\r\nTest0\r\nTest1\r\n")
+    assert len(config_manager.read_csv(csv_file)) == 3
+
+
+def test_write_csv_with_explicit_fieldnames(tmp_path, config_manager):
+    csv_file = tmp_path / "config.csv"
+    config_manager.write_csv(csv_file, iter([]), fieldnames=["name", "version"])
+    assert csv_file.read_text().strip() == "name,version"
+    config_manager.write_csv(csv_file, [{"version": "1.0", "name": "Test"}], fieldnames=["name", "version"])
+    assert csv_file.read_text().splitlines() == ["name,version", "Test,1.0"]
+
+
+def test_read_xml_incremental_matches_read_xml(tmp_path):
+    xml_content = """<config>
+                        <name>Test</name>
+                        <nested>outer<inner>ignored</inner></nested>
+                        <version>1.0</version>
+                        <empty/>
+                     </config>"""
+    xml_file = tmp_path / "config.xml"
+    xml_file.write_text(xml_content)
+    manager = ConfigManager()
+    assert manager.read_xml(xml_file, incremental=True) == manager.read_xml(xml_file)
+
+
+def test_iter_xml_yields_tag_text_pairs(tmp_path):
+    xml_file = tmp_path / "config.xml"
+    xml_file.write_text("<config><name>Test</name><version>1.0</version></config>")
+    manager = ConfigManager()
+    assert list(manager.iter_xml(xml_file)) == [("name", "Test"), ("version", "1.0")]
+
+
+def test_iter_xml_invalid_file_stops_iteration(tmp_path):
+    xml_file = tmp_path / "config.xml"
+    xml_file.write_text("<config><name>Test</name><version>")
+    manager = ConfigManager()
+    assert list(manager.iter_xml(xml_file)) == [("name", "Test")]
+    assert manager.read_xml(xml_file, incremental=True) == {}
+
+
+@pytest.fixture(params=["json", "orjson", "ujson"])
+def json_backend(request):
+    if request.param != "json":
+        pytest.importorskip(request.param)
+    return request.param
+
+
+def test_json_backends_round_trip(tmp_path, json_backend):
+    json_file = tmp_path / "config.json"
+    data = {"name": "Test", "version": 1.0, "tags": ["a", "b"], "nested": {"enabled": True}}
+    manager = ConfigManager(json_backend=json_backend)
+    assert manager._json.name == json_backend
+    manager.write_json(json_file, data)
+    assert manager.read_json(json_file) == data
+    assert ConfigManager().read_json(json_file) == data
+
+
+def test_json_backends_invalid_file(tmp_path, json_backend):
+    json_file = tmp_path / "config.json"
+    json_file.write_text("{invalid")
+    assert ConfigManager(json_backend=json_backend).read_json(json_file) == {}
+
+
+@pytest.mark.parametrize("backend", ["orjson", "ujson"])
+def test_missing_json_backend_falls_back_to_json(monkeypatch, caplog, backend):
+    monkeypatch.setitem(sys.modules, backend, None)  # Makes the import raise ImportError
+    with caplog.at_level("WARNING"):
+        manager = ConfigManager(json_backend=backend)
+    assert manager._json.name == "json"
+    assert f"JSON backend '{backend}' is not installed" in caplog.text
+
+
+def test_json_compact_output(tmp_path):
+    json_file = tmp_path / "config.json"
+    ConfigManager(json_compact=True).write_json(json_file, {"name": "Test", "version": "1.0"})
+    assert json_file.read_text() == '{"name":"Test","version":"1.0"}'
+
+
+def test_unknown_json_backend():
+    with pytest.raises(ValueError):
+        ConfigManager(json_backend="yaml")
+
+
+def test_writes_through_symlink(tmp_path, config_manager):
+    target = tmp_path / "real" / "config.json"
+    target.parent.mkdir()
+    target.write_text('{"version": "1.0"}')
+    link = tmp_path / "config.json"
+    link.symlink_to(target)
+    config_manager.write_json(str(link), {"version": "2.0"})
+    assert link.is_symlink()
+    assert json.loads(target.read_text()) == {"version": "2.0"}
+
+
+def test_writes_replace_file_atomically(tmp_path, config_manager):
+    json_file = tmp_path / "config.json"
+    json_file.write_text("{}")
+    inode = os.stat(json_file).st_ino
+    config_manager.write_json(json_file, {"name": "Test"})
+    assert os.stat(json_file).st_ino != inode
+    assert os.listdir(tmp_path) == ["config.json"]
+
+
+def test_failed_write_keeps_original_file(tmp_path, config_manager):
+    csv_file = tmp_path / "config.csv"
+    csv_file.write_text("name\nTest\n")
+
+    def rows():
+        yield {"name": "Example"}
+        raise RuntimeError("generator failed")
+
+    config_manager.write_csv(csv_file, rows())
+    assert csv_file.read_text() == "name\nTest\n"
+    assert os.listdir(tmp_path) == ["config.csv"]
+
+
+def test_atomic_write_keeps_file_permissions(tmp_path):
+    xml_file = tmp_path / "config.xml"
+    xml_file.write_text("<config/>")
+    os.chmod(xml_file, 0o640)
+    ConfigManager(fsync=True).write_xml(xml_file, {"name": "Test"})
+    assert os.stat(xml_file).st_mode & 0o777 == 0o640
+
+
+def test_link_backup_strategy_shares_inode():
+    manager = ConfigManager(backup_strategy="link")
+    manager.write_json(TEST_JSON, {"version": "1.0"})
+    inode = os.stat(TEST_JSON).st_ino
+    manager.write_json(TEST_JSON, {"version": "2.0"})
+    backup_dir = backup_dir_of(TEST_JSON)
+    backups = os.listdir(backup_dir)
+    assert len(backups) == 1
+    backup_path = os.path.join(backup_dir, backups[0])
+    assert os.stat(backup_path).st_ino == inode
+    with open(backup_path) as f:
+        assert json.load(f) == {"version": "1.0"}
+
+
+def test_reflink_backup_strategy_copies_content():
+    manager = ConfigManager(backup_strategy="reflink")
+    manager.write_csv(TEST_CSV, [{"name": "Test1"}])
+    manager.write_csv(TEST_CSV, [{"name": "Test2"}])
+    backup_dir = backup_dir_of(TEST_CSV)
+    backups = os.listdir(backup_dir)
+    assert len(backups) == 1
+    with open(os.path.join(backup_dir, backups[0])) as f:
+        assert f.read() == "name\nTest1\n"
+
+
+def test_reflink_falls_back_to_copy_after_short_copy(monkeypatch):
+    import src.config_manager as config_manager_module
+
+    def no_clone(*args):
+        raise OSError("FICLONE not supported")
+
+    monkeypatch.setattr(config_manager_module.fcntl, "ioctl", no_clone)
+    monkeypatch.setattr(os, "copy_file_range", lambda src, dst, count: 0, raising=False)
+    manager = ConfigManager(backup_strategy="reflink")
+    manager.write_csv(TEST_CSV, [{"name": "Test1"}])
+    manager.write_csv(TEST_CSV, [{"name": "Test2"}])
+    backup_dir = backup_dir_of(TEST_CSV)
+    backups = os.listdir(backup_dir)
+    assert len(backups) == 1
+    with open(os.path.join(backup_dir, backups[0])) as f:
+        assert f.read() == "name\nTest1\n"
+
+
+def test_unknown_backup_strategy():
+    with pytest.raises(ValueError):
+        ConfigManager(backup_strategy="rsync")
+
+
+def test_manage_backups_keeps_newest_by_name_timestamp(config_manager):
+    backup_dir = 'config-backups'
+    os.makedirs(backup_dir)
+    names = [f"{TEST_JSON}.2024-01-0{day}_12-00-00.bak" for day in range(1, 8)]
+    # Create the files newest first so creation times disagree with the names
+    for name in reversed(names):
+        open(os.path.join(backup_dir, name), "w").close()
+    other = f"{TEST_JSON}.old.2024-01-01_12-00-00.bak"
+    open(os.path.join(backup_dir, other), "w").close()
+    config_manager._manage_backups(backup_dir, TEST_JSON)
+    assert sorted(os.listdir(backup_dir)) == sorted(names[2:] + [other])
+
+
+def test_backups_are_grouped_per_file(config_manager):
+    for i in range(2):
+        config_manager.write_json(TEST_JSON, {"version": str(i)})
+        config_manager.write_xml(TEST_XML, {"version": str(i)})
+    assert sorted(os.listdir('config-backups')) == sorted(os.path.basename(backup_dir_of(file_name))
+                                                          for file_name in (TEST_JSON, TEST_XML))
+    for file_name in (TEST_JSON, TEST_XML):
+        backups = os.listdir(backup_dir_of(file_name))
+        assert len(backups) == 1
+        assert backups[0].startswith(file_name + ".")
+
+
+def test_files_with_same_name_do_not_share_backups(tmp_path, config_manager):
+    paths = [str(tmp_path / directory / TEST_JSON) for directory in ("a", "b")]
+    for file_path in paths:
+        os.makedirs(os.path.dirname(file_path))
+    for i in range(2):
+        for who, file_path in zip("ab", paths):
+            config_manager.write_json(file_path, {"who": f"{who}{i}"})
+    assert backup_dir_of(paths[0]) != backup_dir_of(paths[1])
+    assert config_manager.restore_backup(paths[0], 0)
+    assert config_manager.read_json(paths[0]) == {"who": "a0"}
+
+
+def test_backup_skipped_when_content_unchanged(config_manager):
+    data = {"name": "Test", "version": "1.0"}
+    for _ in range(3):
+        config_manager.write_json(TEST_JSON, data)
+    backup_dir = backup_dir_of(TEST_JSON)
+    backups = os.listdir(backup_dir)
+    assert len(backups) == 1
+    with open(TEST_JSON) as f, open(os.path.join(backup_dir, backups[0])) as b:
+        assert f.read() == b.read()
+
+
+def test_operations_log_structured_fields(tmp_path, caplog):
+    csv_file = tmp_path / "config.csv"
+    manager = ConfigManager(cache_size=8)
+    with caplog.at_level("INFO"):
+        manager.write_csv(csv_file, [{"name": "Test"}, {"name": "Example"}])
+        manager.read_csv(csv_file)
+        manager.read_csv(csv_file)
+    records = [record for record in caplog.records if hasattr(record, "op")]
+    assert [record.op for record in records] == ["write_csv", "read_csv", "read_csv"]
+    assert [record.cache_hit for record in records] == [None, False, True]
+    assert all(record.rows == 2 for record in records)
+    assert all(record.bytes == os.path.getsize(csv_file) for record in records)
+    assert all(record.duration_ms >= 0 for record in records)
+
+
+def test_failed_operations_log_structured_fields(tmp_path, caplog):
+    missing_file = str(tmp_path / "missing.json")
+    manager = ConfigManager()
+    with caplog.at_level("ERROR"):
+        manager.read_json(missing_file)
+        list(manager.iter_csv(str(tmp_path / "missing.csv")))
+        with pytest.raises(TypeError):
+            manager.write_xml(str(tmp_path / "config.xml"), "Invalid data type")
+    assert [(record.op, os.path.basename(record.path)) for record in caplog.records] == [
+        ("read_json", "missing.json"), ("iter_csv", "missing.csv"), ("write_xml", "config.xml")]
+    assert all(record.duration_ms >= 0 for record in caplog.records)
+
+
+def test_operations_log_without_extra_stat(tmp_path, monkeypatch, caplog):
+    manager = ConfigManager()
+    xml_file, csv_file = str(tmp_path / "config.xml"), str(tmp_path / "config.csv")
+    calls = []
+    monkeypatch.setattr(os.path, "getsize", lambda p: calls.append(p))
+    with caplog.at_level("INFO"):
+        manager.write_xml(xml_file, {"name": "Test"})
+        manager.write_csv(csv_file, [{"name": "Test"}])
+        manager.read_csv(csv_file)
+        list(manager.iter_csv(csv_file))
+    assert calls == []
+    sizes = {record.op: record.bytes for record in caplog.records if getattr(record, "op", None)}
+    assert sizes["write_xml"] == os.stat(xml_file).st_size
+    assert sizes["write_csv"] == os.stat(csv_file).st_size
+    assert sizes["read_csv"] is None and sizes["iter_csv"] is None
+
+
+def test_path_locks_allow_concurrent_readers_and_exclusive_writers():
+    locks = _PathLocks(4)
+    second_reader = threading.Event()
+    writer_entered = threading.Event()
+
+    def read():
+        with locks.read("config.json"):
+            second_reader.set()
+
+    def write():
+        with locks.write("config.json"):
+            writer_entered.set()
+
+    with locks.read("config.json"):
+        threading.Thread(target=read).start()
+        assert second_reader.wait(1)  # Readers do not block each other
+        writer = threading.Thread(target=write)
+        writer.start()
+        assert not writer_entered.wait(0.1)  # The writer waits for the reader
+    writer.join(1)
+    assert writer_entered.is_set()
+
+
+def test_concurrent_writes_to_same_path_are_serialized(tmp_path):
+    json_file = str(tmp_path / "config.json")
+    manager = ConfigManager()
+    threads = [threading.Thread(target=manager.write_json, args=(json_file, {"writer": str(i), "payload": "x" * 1000}))
+               for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert manager.read_json(json_file)["payload"] == "x" * 1000
+    stats = manager.lock_stats()
+    assert stats["write_acquisitions"] == 8
+    assert stats["read_acquisitions"] == 1
+    assert stats["write_wait_seconds"] >= 0
+
+
+@pytest.mark.skipif(os.name != "posix", reason="fcntl locks are POSIX only")
+def test_process_lock_times_out_while_another_holder_has_it(tmp_path):
+    import fcntl
+    json_file = str(tmp_path / "config.json")
+    lock_dir = tmp_path / "locks"
+    manager = ConfigManager(process_lock=True, lock_timeout=0.1, lock_dir=str(lock_dir))
+    manager.write_json(json_file, {"version": "1.0"})
+    (lock_name,) = os.listdir(lock_dir)
+    with open(lock_dir / lock_name, "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        manager.write_json(json_file, {"version": "2.0"})
+        assert manager.read_json(json_file) == {}
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+        fcntl.flock(lock_file, fcntl.LOCK_SH)
+        assert manager.read_json(json_file) == {"version": "1.0"}  # Shared locks coexist
+    manager.write_json(json_file, {"version": "2.0"})
+    assert manager.read_json(json_file) == {"version": "2.0"}
+
+
+@pytest.mark.skipif(os.name != "posix", reason="fcntl locks are POSIX only")
+def test_process_lock_files_stay_out_of_config_folders(tmp_path):
+    config_dir, lock_dir = tmp_path / "configs", tmp_path / "locks"
+    config_dir.mkdir()
+    manager = ConfigManager(process_lock=True, lock_dir=str(lock_dir))
+    assert manager.read_json(str(config_dir / "missing.json")) == {}
+    assert not lock_dir.exists()
+    manager.write_json(str(config_dir / "config.json"), {"version": "1.0"})
+    assert manager.read_json(str(config_dir / "config.json")) == {"version": "1.0"}
+    assert os.listdir(config_dir) == ["config.json"]
+    assert len(os.listdir(lock_dir)) == 1
+
+
+def test_read_many_reads_all_formats_and_reports_errors(tmp_path, caplog):
+    json_file = tmp_path / "config.json"
+    json_file.write_text(json.dumps({"name": "Test"}))
+    xml_file = tmp_path / "config.xml"
+    xml_file.write_text("<config><name>Test</name></config>")
+    csv_file = tmp_path / "config.csv"
+    csv_file.write_text("name\nTest\n")
+    invalid_file = tmp_path / "invalid.json"
+    invalid_file.write_text("{invalid")
+    missing_file = tmp_path / "missing.json"
+    manager = ConfigManager()
+    with caplog.at_level("INFO"):
+        results, errors = manager.read_many([json_file, xml_file, csv_file, invalid_file, missing_file])
+    assert results == {str(json_file): {"name": "Test"}, str(xml_file): {"name": "Test"},
+                       str(csv_file): [{"name": "Test"}]}
+    assert errors == {str(invalid_file): f"Error: The file '{invalid_file}' is not a valid JSON file.",
+                      str(missing_file): f"Error: The file '{missing_file}' was not found."}
+    assert len([record for record in caplog.records if record.name == "root"]) == 1
+
+
+def test_read_many_parses_large_files_in_processes(tmp_path):
+    json_file = tmp_path / "large.json"
+    json_file.write_text(json.dumps({f"key{i}": i for i in range(1000)}))
+    small_file = tmp_path / "small.json"
+    small_file.write_text(json.dumps({"name": "Test"}))
+    results, errors = ConfigManager(cache_size=8).read_many([json_file, small_file], process_threshold=1024)
+    assert errors == {}
+    assert results[str(json_file)]["key999"] == 999
+    assert results[str(small_file)] == {"name": "Test"}
+
+
+def test_read_many_spawns_process_pool_only_for_large_files(tmp_path, monkeypatch):
+    import src.config_manager as config_manager_module
+    contexts = []
+    pool_class = config_manager_module.ProcessPoolExecutor
+
+    def recording_pool(*args, **kwargs):
+        contexts.append(kwargs.get("mp_context"))
+        return pool_class(*args, **kwargs)
+
+    monkeypatch.setattr(config_manager_module, "ProcessPoolExecutor", recording_pool)
+    small_file = tmp_path / "small.json"
+    small_file.write_text(json.dumps({"name": "Test"}))
+    manager = ConfigManager()
+    assert manager.read_many([small_file], process_threshold=1024) == ({str(small_file): {"name": "Test"}}, {})
+    assert contexts == []
+    large_file = tmp_path / "large.json"
+    large_file.write_text(json.dumps({f"key{i}": i for i in range(1000)}))
+    results, errors = manager.read_many([small_file, large_file], process_threshold=1024)
+    assert errors == {} and results[str(large_file)]["key999"] == 999
+    assert [context.get_start_method() for context in contexts] == ["spawn"]
+
+
+def test_write_many_backs_up_and_writes_all_files(tmp_path, config_manager):
+    json_file = str(tmp_path / "config.json")
+    csv_file = str(tmp_path / "config.csv")
+    xml_file = str(tmp_path / "config.xml")
+    config_manager.write_json(json_file, {"version": "1.0"})
+    written, errors = config_manager.write_many({
+        json_file: {"version": "2.0"},
+        csv_file: ({"name": f"Test{i}"} for i in range(3)),
+        xml_file: {"name": "Test"},
+        str(tmp_path / "config.yaml"): {},
+        str(tmp_path / "invalid.json"): ["not", "a", "dict"],
+    })
+    assert sorted(written) == sorted([json_file, csv_file, xml_file])
+    assert set(errors) == {str(tmp_path / "config.yaml"), str(tmp_path / "invalid.json")}
+    assert config_manager.read_json(json_file) == {"version": "2.0"}
+    assert len(config_manager.read_csv(csv_file)) == 3
+    assert config_manager.read_xml(xml_file) == {"name": "Test"}
+    assert os.listdir('config-backups') == [os.path.basename(backup_dir_of(json_file))]
+    assert len(os.listdir(backup_dir_of(json_file))) == 1
+
+
+def test_write_many_prunes_each_backup_folder_once(tmp_path, monkeypatch):
+    manager = ConfigManager()
+    paths = [str(tmp_path / f"config{i}.json") for i in range(5)]
+    for file_path in paths:
+        manager.write_json(file_path, {"version": "1.0"})
+    calls = []
+    prune = manager._manage_backups
+    monkeypatch.setattr(manager, "_manage_backups", lambda *args: calls.append(args) or prune(*args))
+    written, errors = manager.write_many({file_path: {"version": "2.0"} for file_path in paths})
+    assert errors == {}
+    assert len(written) == 5
+    assert len(calls) == 5
+
+
+def test_write_many_reports_failed_pruning_per_file(tmp_path, monkeypatch):
+    manager = ConfigManager()
+    paths = [str(tmp_path / "config.json"), str(tmp_path / "config.xml")]
+    manager.write_json(paths[0], {"version": "1.0"})
+    manager.write_xml(paths[1], {"version": "1.0"})
+    prune = manager._manage_backups
+
+    def fail_for_json(backup_dir, file_name):
+        if file_name == "config.json":
+            raise ValueError("corrupt index")
+        prune(backup_dir, file_name)
+
+    monkeypatch.setattr(manager, "_manage_backups", fail_for_json)
+    written, errors = manager.write_many({paths[0]: {"version": "2.0"}, paths[1]: {"version": "2.0"}})
+    assert written == [paths[1]]
+    assert list(errors) == [paths[0]] and "corrupt index" in errors[paths[0]]
+    assert manager.read_json(paths[0]) == {"version": "1.0"}
+
+
+def test_write_many_leaves_pruning_to_backup_worker(tmp_path, monkeypatch):
+    manager = ConfigManager(async_backups=True)
+    json_file = str(tmp_path / "config.json")
+    manager.write_json(json_file, {"version": "1.0"})
+    calls = []
+    monkeypatch.setattr(manager, "_manage_backups", lambda *args: calls.append(threading.current_thread().name))
+    written, errors = manager.write_many({json_file: {"version": "2.0"}})
+    manager.flush_backups()
+    assert written == [json_file] and errors == {}
+    assert calls == ["config-backups"]
+
+
+def test_write_many_writes_paths_naming_the_same_file_once(tmp_path, monkeypatch):
+    manager = ConfigManager()
+    monkeypatch.chdir(tmp_path)
+    written, errors = manager.write_many({"config.json": {"version": "1.0"},
+                                          os.path.join(".", "config.json"): {"version": "2.0"}})
+    assert written == [os.path.join(".", "config.json")]
+    assert list(errors) == ["config.json"]
+    assert manager.read_json("config.json") == {"version": "2.0"}
+
+
+def test_write_many_keeps_files_locked_from_backup_to_write(tmp_path, monkeypatch):
+    manager = ConfigManager(lock_stripes=1)  # Both files share a stripe
+    paths = [str(tmp_path / "config.json"), str(tmp_path / "config.xml")]
+    manager.write_json(paths[0], {"version": "1.0"})
+    intruders = []
+    backup = manager._backup_file
+
+    def backup_then_intrude(file_path, manage_backups=True):
+        backup(file_path, manage_backups)
+        if file_path == paths[0] and not intruders:
+            intruder = threading.Thread(target=manager.write_json, args=(file_path, {"version": "intruder"}))
+            intruder.start()
+            intruders.append(intruder)
+
+    monkeypatch.setattr(manager, "_backup_file", backup_then_intrude)
+    written, errors = manager.write_many({paths[0]: {"version": "2.0"}, paths[1]: {"version": "2.0"}})
+    intruders[0].join()
+    assert errors == {}
+    assert manager.read_json(paths[0]) == {"version": "intruder"}
+    restored = ConfigManager()
+    assert restored.restore_backup(paths[0], 0)
+    assert restored.read_json(paths[0]) == {"version": "2.0"}
+
+
+def test_async_backups_are_written_by_worker():
+    manager = ConfigManager(async_backups=True)
+    manager.write_json(TEST_JSON, {"version": "1.0"})
+    manager.write_json(TEST_JSON, {"version": "2.0"})
+    manager.flush_backups()
+    backup_dir = backup_dir_of(TEST_JSON)
+    backups = os.listdir(backup_dir)
+    assert len(backups) == 1
+    with open(os.path.join(backup_dir, backups[0])) as f:
+        assert json.load(f) == {"version": "1.0"}
+
+
+def test_async_backups_are_written_at_exit(tmp_path):
+    repo = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    script = (
+        "import sys; sys.path[:0] = [sys.argv[1]]\n"
+        "from src.config_manager import ConfigManager\n"
+        "import time\n"
+        "manager = ConfigManager(async_backups=True)\n"
+        "store = manager._store_backup\n"
+        "manager._store_backup = lambda *args, **kwargs: time.sleep(0.02) or store(*args, **kwargs)\n"
+        "for i in range(20):\n"
+        "    manager.write_json('config.json', {'version': i})\n"
+    )
+    subprocess.run([sys.executable, "-c", script, repo], cwd=tmp_path, check=True, capture_output=True)
+    backup_dir = os.path.join(tmp_path, ConfigManager()._backup_dir_for(str(tmp_path / "config.json")))
+    backups = os.listdir(backup_dir)
+    assert len(backups) == 5
+    assert all(name.endswith(".bak") for name in backups)
+
+
+def test_close_stops_workers_and_backs_up_synchronously():
+    with ConfigManager(async_backups=True, backup_store="pack") as manager:
+        manager.write_json(TEST_JSON, {"version": "1.0"})
+        threads = [thread for _, thread in manager._workers]
+    assert not any(thread.is_alive() for thread in threads)
+    manager.write_json(TEST_JSON, {"version": "2.0"})
+    manager.write_json(TEST_JSON, {"version": "3.0"})
+    assert len(manager.list_backups(TEST_JSON)) == 2
+
+
+def test_unclosed_manager_is_collected_and_its_worker_stops():
+    manager = ConfigManager(async_backups=True)
+    manager.write_json(TEST_JSON, {"version": "1.0"})
+    manager.write_json(TEST_JSON, {"version": "2.0"})
+    manager.flush_backups()
+    threads = [thread for _, thread in manager._workers]
+    collected = weakref.ref(manager)
+    del manager
+    gc.collect()
+    assert collected() is None
+    for thread in threads:
+        thread.join(timeout=5)
+    assert threads and not any(thread.is_alive() for thread in threads)
+
+
+def test_stale_staging_files_are_swept(config_manager, monkeypatch):
+    monkeypatch.setattr("src.config_manager._STALE_FILE_AGE", -1)
+    backup_dir = backup_dir_of(TEST_JSON)
+    os.makedirs(backup_dir)
+    stale = [f".{TEST_JSON}.0123.pending", f"{TEST_JSON}.0123.bak.xz.tmp"]
+    for name in stale:
+        open(os.path.join(backup_dir, name), "w").close()
+    config_manager.write_json(TEST_JSON, {"version": "1.0"})
+    config_manager.write_json(TEST_JSON, {"version": "2.0"})
+    assert not set(stale) & set(os.listdir(backup_dir))
+    assert len(os.listdir(backup_dir)) == 1
+
+
+def test_async_backups_fall_back_to_in_memory_snapshot(monkeypatch):
+    manager = ConfigManager(async_backups=True)
+    manager.write_csv(TEST_CSV, [{"name": "Test1"}])
+
+    def no_link(src, dst):
+        raise OSError("links not supported")
+
+    monkeypatch.setattr(os, "link", no_link)
+    manager.write_csv(TEST_CSV, [{"name": "Test2"}])
+    manager.flush_backups()
+    backup_dir = backup_dir_of(TEST_CSV)
+    backups = os.listdir(backup_dir)
+    assert len(backups) == 1
+    with open(os.path.join(backup_dir, backups[0])) as f:
+        assert f.read() == "name\nTest1\n"
+
+
+@pytest.mark.parametrize("compression, suffix", [("gzip", ".bak.gz"), ("lzma", ".bak.xz"), ("zlib", ".bak.zz")])
+def test_compressed_backup_is_restored(compression, suffix):
+    manager = ConfigManager(backup_compression=compression)
+    manager.write_json(TEST_JSON, {"version": "1.0"})
+    manager.write_json(TEST_JSON, {"version": "2.0"})
+    backups = manager.list_backups(TEST_JSON)
+    assert len(backups) == 1 and backups[0].endswith(suffix)
+    assert manager.restore_backup(TEST_JSON, backups[0])
+    assert manager.read_json(TEST_JSON) == {"version": "1.0"}
+    assert len(manager.list_backups(TEST_JSON)) == 2
+
+
+def test_restore_backup_by_index(config_manager):
+    for i in range(3):
+        config_manager.write_csv(TEST_CSV, [{"version": str(i)}])
+    assert config_manager.restore_backup(TEST_CSV, 1)
+    assert config_manager.read_csv(TEST_CSV) == [{"version": "0"}]
+
+
+def test_restore_backup_rejects_corrupt_backup(config_manager):
+    config_manager.write_json(TEST_JSON, {"version": "1.0"})
+    config_manager.write_json(TEST_JSON, {"version": "2.0"})
+    name = config_manager.list_backups(TEST_JSON)[0]
+    with open(os.path.join(backup_dir_of(TEST_JSON), name), "w") as f:
+        f.write('{"version": "tampered"}')
+    assert not config_manager.restore_backup(TEST_JSON, name)
+    assert not config_manager.restore_backup(TEST_JSON, 5)
+    assert config_manager.read_json(TEST_JSON) == {"version": "2.0"}
+
+
+def test_unknown_backup_compression_is_rejected():
+    with pytest.raises(ValueError):
+        ConfigManager(backup_compression="bz2")
+
+
+def _csv_rows(count, changed=()):
+    return [{"key": str(i), "value": "changed" if i in changed else "x" * 20} for i in range(count)]
+
+
+def test_delta_backups_store_only_the_change():
+    manager = ConfigManager(backup_delta=True)
+    manager.write_csv(TEST_CSV, _csv_rows(1000))
+    manager.write_csv(TEST_CSV, _csv_rows(1000, changed={500}))
+    manager.write_csv(TEST_CSV, _csv_rows(1000, changed={500, 900}))
+    backup_dir = backup_dir_of(TEST_CSV)
+    (delta,) = [name for name in os.listdir(backup_dir) if name.endswith(".bak.delta")]
+    assert os.path.getsize(os.path.join(backup_dir, delta)) < os.path.getsize(TEST_CSV) // 20
+    assert manager.restore_backup(TEST_CSV, delta)
+    assert manager.read_csv(TEST_CSV) == _csv_rows(1000, changed={500})
+
+
+def test_delta_falls_back_to_full_backup_for_large_changes():
+    manager = ConfigManager(backup_delta=True)
+    manager.write_csv(TEST_CSV, _csv_rows(100))
+    manager.write_csv(TEST_CSV, _csv_rows(100, changed={50}))
+    manager.write_csv(TEST_CSV, _csv_rows(100, changed=set(range(100))))
+    manager.write_csv(TEST_CSV, _csv_rows(100))
+    backups = manager.list_backups(TEST_CSV)
+    assert sum(name.endswith(".bak") for name in backups) == 2
+    assert sum(name.endswith(".bak.delta") for name in backups) == 1
+
+
+def test_retention_keeps_base_of_retained_deltas():
+    manager = ConfigManager(backup_delta=True)
+    manager._MAX_BACKUPS = 2
+    for i in range(5):
+        manager.write_csv(TEST_CSV, _csv_rows(100, changed={i}))
+    backups = manager.list_backups(TEST_CSV)
+    assert sum(name.endswith(".bak") for name in backups) == 1
+    assert sum(name.endswith(".bak.delta") for name in backups) == 2
+    delta = next(name for name in backups if name.endswith(".bak.delta"))
+    assert manager.restore_backup(TEST_CSV, delta)
+    assert manager.read_csv(TEST_CSV) in [_csv_rows(100, changed={i}) for i in range(4)]
+
+
+def test_delta_chains_are_rebased_with_default_settings():
+    manager = ConfigManager(backup_delta=True)
+    manager.write_csv(TEST_CSV, _csv_rows(100))
+    manager.write_csv(TEST_CSV, _csv_rows(100, changed={0}))
+    (first_base,) = manager.list_backups(TEST_CSV)
+    for i in range(1, 60):
+        manager.write_csv(TEST_CSV, _csv_rows(100, changed={i}))
+    backups = manager.list_backups(TEST_CSV)
+    assert first_base not in backups
+    for name in backups:
+        if name.endswith(".delta"):
+            with open(os.path.join(backup_dir_of(TEST_CSV), name), "rb") as f:
+                magic, depth, _ = f.readline().split(b" ", 2)
+            assert magic == b"DELTA1" and 1 <= int(depth) <= 16
+
+
+def test_backup_delta_cannot_be_compressed():
+    with pytest.raises(ValueError):
+        ConfigManager(backup_delta=True, backup_compression="gzip")
+
+
+def test_pack_store_appends_snapshots_to_one_file():
+    manager = ConfigManager(backup_store="pack")
+    for i in range(4):
+        manager.write_json(TEST_JSON, {"version": str(i)})
+    manager.write_json(TEST_JSON, {"version": "3"})
+    manager.write_json(TEST_JSON, {"version": "3"})
+    backup_dir = backup_dir_of(TEST_JSON)
+    assert sorted(os.listdir(backup_dir)) == [f"{TEST_JSON}.0.pack", f"{TEST_JSON}.idx"]
+    assert len(manager.list_backups(TEST_JSON)) == 4
+    assert manager.restore_backup(TEST_JSON, 2)
+    assert manager.read_json(TEST_JSON) == {"version": "1"}
+
+
+def test_pack_store_is_compacted_in_background():
+    manager = ConfigManager(backup_store="pack")
+    for i in range(12):
+        manager.write_json(TEST_JSON, {"version": str(i)})
+    manager.flush_backups()
+    backup_dir = backup_dir_of(TEST_JSON)
+    assert sorted(os.listdir(backup_dir)) == [f"{TEST_JSON}.1.pack", f"{TEST_JSON}.idx"]
+    assert len(manager.list_backups(TEST_JSON)) == 5
+    assert manager.restore_backup(TEST_JSON, 0)
+    assert manager.read_json(TEST_JSON) == {"version": "10"}
+
+
+def test_pack_compaction_worker_starts_lazily_and_stops_with_manager():
+    manager = ConfigManager(backup_store="pack")
+    assert manager._workers == []
+    for i in range(12):
+        manager.write_json(TEST_JSON, {"version": str(i)})
+    manager.flush_backups()
+    threads = [thread for _, thread in manager._workers]
+    collected = weakref.ref(manager)
+    del manager
+    gc.collect()
+    assert collected() is None
+    for thread in threads:
+        thread.join(timeout=5)
+    assert len(threads) == 1 and not threads[0].is_alive()
+
+
+def test_pack_compaction_does_not_drop_concurrent_append(monkeypatch):
+    writer, compactor = (ConfigManager(backup_store="pack", process_lock=True) for _ in range(2))
+    for i in range(8):
+        writer.write_json(TEST_JSON, {"version": str(i)})
+    backup_dir, file_name = backup_dir_of(TEST_JSON), TEST_JSON
+    appended = []
+    write_index = compactor._pack._write_index
+
+    def append_while_compacting(*args):
+        thread = threading.Thread(target=lambda: appended.append(writer._pack.append(
+            backup_dir, file_name, [b"late"], writer._next_backup_id(), "ff" * 16)))
+        thread.start()
+        thread.join(0.2)  # Blocked by the index lock
+        appended.append(thread)
+        write_index(*args)
+
+    monkeypatch.setattr(compactor._pack, "_write_index", append_while_compacting)
+    assert compactor._pack.compact(backup_dir, file_name, 5) == 2
+    appended[0].join()
+    names = [name for _, name, _ in writer._pack.entries(backup_dir, file_name)]
+    assert len(names) == 6
+    assert names[-1] == appended[1]
+
+
+def test_pack_store_ignores_torn_index_record():
+    manager = ConfigManager(backup_store="pack")
+    for i in range(2):
+        manager.write_csv(TEST_CSV, [{"version": str(i)}])
+    with open(os.path.join(backup_dir_of(TEST_CSV), f"{TEST_CSV}.idx"), "ab") as f:
+        f.write(b"torn")
+    manager.write_csv(TEST_CSV, [{"version": "2"}])
+    assert len(manager.list_backups(TEST_CSV)) == 2
+    assert manager.restore_backup(TEST_CSV, 0)
+    assert manager.read_csv(TEST_CSV) == [{"version": "1"}]
+
+
+def test_backups_within_the_same_second_are_all_kept(config_manager):
+    for i in range(5):
+        config_manager.write_json(TEST_JSON, {"version": str(i)})
+    backups = config_manager.list_backups(TEST_JSON)
+    assert len(backups) == 4
+    assert backups == sorted(backups, reverse=True)
+    assert config_manager.restore_backup(TEST_JSON, 3)
+    assert config_manager.read_json(TEST_JSON) == {"version": "0"}
+
+
+def test_backup_ids_are_monotonic_when_the_clock_stalls(config_manager, monkeypatch):
+    monkeypatch.setattr("time.time_ns", lambda: 1_700_000_000_000_000_000)
+    ids = [config_manager._next_backup_id() for _ in range(3)]
+    assert ids == ["01700000000000000000-000000", "01700000000000000000-000001", "01700000000000000000-000002"]
+
+
+def test_legacy_backup_names_sort_before_new_ones(config_manager):
+    backup_dir = backup_dir_of(TEST_JSON)
+    os.makedirs(backup_dir)
+    legacy = f"{TEST_JSON}.2024-01-01_12-00-00.bak"
+    open(os.path.join(backup_dir, legacy), "w").close()
+    config_manager.write_json(TEST_JSON, {"version": "1.0"})
+    config_manager.write_json(TEST_JSON, {"version": "2.0"})
+    assert config_manager.list_backups(TEST_JSON)[-1] == legacy
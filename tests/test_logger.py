@@ -0,0 +1,202 @@
+import datetime
+import gzip
+import json
+import logging
+import os
+import queue
+import pytest
+from logger import Logger, _BoundedQueueHandler, _JsonFormatter, _RotatingFileHandler, _SamplingFilter
+
+
+def make_record(message):
+    return logging.LogRecord("test", logging.INFO, __file__, 0, message, None, None)
+
+
+@pytest.fixture(autouse=True)
+def reset_logger():
+    yield
+    Logger.configure(queue_size=10000, overflow="block", sample_every=1, rate_limit=0)
+
+
+def test_drop_new_policy_discards_incoming_records():
+    handler = _BoundedQueueHandler(queue.Queue(2), "drop_new")
+    for i in range(5):
+        handler.emit(make_record(f"message {i}"))
+    assert handler.dropped == 3
+    assert [handler.queue.get_nowait().msg for _ in range(2)] == ["message 0", "message 1"]
+
+
+def test_drop_oldest_policy_keeps_newest_records():
+    handler = _BoundedQueueHandler(queue.Queue(2), "drop_oldest")
+    for i in range(5):
+        handler.emit(make_record(f"message {i}"))
+    assert handler.dropped == 3
+    assert [handler.queue.get_nowait().msg for _ in range(2)] == ["message 3", "message 4"]
+
+
+def test_finish_flushes_queued_records():
+    Logger.configure(queue_size=1, overflow="block")
+    Logger()
+    log_file = Logger._listener.handlers[0].baseFilename
+    for i in range(20):
+        Logger.info(f"queued message {i}")
+    Logger.finish()
+    with open(log_file) as f:
+        content = f.read()
+    assert "queued message 19" in content
+    assert "END PROCESS" in content
+    assert Logger._instance is None
+
+
+def test_shutdown_detaches_queue_before_stopping_listener(monkeypatch):
+    logger = Logger()
+    queue_handler, listener = Logger._queue_handler, Logger._listener
+    attached = []
+    stop = listener.stop
+
+    def checked_stop():
+        attached.append(queue_handler in logger.handlers)
+        stop()
+
+    monkeypatch.setattr(listener, "stop", checked_stop)
+    Logger._shutdown()
+    assert attached == [False]
+
+
+def test_configure_rejects_unknown_overflow_policy():
+    with pytest.raises(ValueError):
+        Logger.configure(overflow="spill")
+
+
+def test_log_arguments_are_formatted_lazily():
+    class Expensive:
+        formatted = 0
+
+        def __str__(self):
+            Expensive.formatted += 1
+            return "expensive"
+
+    Logger.set_level(logging.WARNING)
+    try:
+        assert not Logger.is_enabled_for(logging.INFO)
+        Logger.info("value: %s", Expensive())
+        assert Expensive.formatted == 0
+    finally:
+        Logger.set_level(logging.INFO)
+    assert Logger.is_enabled_for(logging.INFO)
+
+
+def test_rotating_handler_rolls_over_on_size(tmp_path):
+    handler = _RotatingFileHandler(str(tmp_path), max_bytes=200, backup_count=2, compress=True)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    for i in range(50):
+        handler.emit(make_record(f"rotating message {i:02d}"))
+    handler.close()
+    today = datetime.date.today().strftime("%Y-%m-%d")
+    files = sorted(os.listdir(tmp_path))
+    rotated = [name for name in files if name.endswith(".log.gz")]
+    assert f"Log_{today}.log" in files
+    assert len(rotated) == 2
+    assert not [name for name in files if name.endswith(".log") and name != f"Log_{today}.log"]
+    with gzip.open(tmp_path / rotated[-1], "rt") as f:
+        assert "rotating message" in f.read()
+
+
+def test_rotating_handler_rolls_over_at_midnight(tmp_path):
+    handler = _RotatingFileHandler(str(tmp_path), compress=False)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    handler.emit(make_record("today"))
+    tomorrow = datetime.datetime.now() + datetime.timedelta(days=1)
+    record = make_record("tomorrow")
+    record.created = tomorrow.timestamp()
+    handler.emit(record)
+    handler.close()
+    today_file = tmp_path / f"Log_{datetime.date.today().strftime('%Y-%m-%d')}.log"
+    tomorrow_file = tmp_path / f"Log_{tomorrow.strftime('%Y-%m-%d')}.log"
+    assert today_file.read_text() == "today\n"
+    assert tomorrow_file.read_text() == "tomorrow\n"
+
+
+def test_rotating_handler_keeps_late_records_in_current_file(tmp_path):
+    handler = _RotatingFileHandler(str(tmp_path), compress=True)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    yesterday = datetime.datetime.now() - datetime.timedelta(days=1)
+    yesterday_file = tmp_path / f"Log_{yesterday.strftime('%Y-%m-%d')}.log.gz"
+    with gzip.open(yesterday_file, "wt") as f:
+        f.write("yesterday\n")
+    handler.emit(make_record("today"))
+    record = make_record("late")
+    record.created = yesterday.timestamp()
+    handler.emit(record)
+    handler.close()
+    today_file = tmp_path / f"Log_{datetime.date.today().strftime('%Y-%m-%d')}.log"
+    assert today_file.read_text() == "today\nlate\n"
+    with gzip.open(yesterday_file, "rt") as f:
+        assert f.read() == "yesterday\n"
+
+
+def test_rotated_file_is_appended_to_existing_archive(tmp_path):
+    handler = _RotatingFileHandler(str(tmp_path), compress=True)
+    rotated = tmp_path / "Log_2024-01-01.log"
+    with gzip.open(f"{rotated}.gz", "wt") as f:
+        f.write("first\n")
+    rotated.write_text("second\n")
+    handler._jobs.put(str(rotated))
+    handler.close()
+    with gzip.open(f"{rotated}.gz", "rt") as f:
+        assert f.read() == "first\nsecond\n"
+
+
+def test_json_formatter_emits_structured_fields():
+    record = make_record("Successfully read JSON file: '%s'")
+    record.args = ("config.json",)
+    record.op = "read_json"
+    record.path = "config.json"
+    record.duration_ms = 1.5
+    record.cache_hit = True
+    entry = json.loads(_JsonFormatter().format(record))
+    assert entry["message"] == "Successfully read JSON file: 'config.json'"
+    assert entry["level"] == "INFO"
+    assert entry["op"] == "read_json"
+    assert entry["duration_ms"] == 1.5
+    assert entry["cache_hit"] is True
+    assert "rows" not in entry
+
+
+def test_sampling_filter_keeps_one_in_n_and_summarizes():
+    handler = _BoundedQueueHandler(queue.Queue(), "block")
+    sampler = _SamplingFilter(handler, sample_every=10)
+    handler.addFilter(sampler)
+    for i in range(100):
+        handler.handle(make_record("Successfully read JSON file"))
+    handler.handle(logging.LogRecord("test", logging.ERROR, __file__, 0, "Error", None, None))
+    sampler.flush()
+    messages = [handler.queue.get_nowait().getMessage() for _ in range(handler.queue.qsize())]
+    assert messages.count("Successfully read JSON file") == 10
+    assert "Error" in messages
+    assert messages[-1] == "Suppressed 90 similar messages: 'Successfully read JSON file'"
+
+
+def test_sampling_filter_bounds_templates():
+    handler = _BoundedQueueHandler(queue.Queue(), "block")
+    sampler = _SamplingFilter(handler, sample_every=10)
+    for i in range(3 * _SamplingFilter.MAX_TEMPLATES):
+        sampler.filter(make_record(f"Read file-{i}.json"))
+    assert len(sampler._seen) <= _SamplingFilter.MAX_TEMPLATES
+
+
+def test_sampling_filter_rate_limits_per_path():
+    handler = _BoundedQueueHandler(queue.Queue(), "block")
+    sampler = _SamplingFilter(handler, rate_limit=3)
+    kept = []
+    for path in ("a.json", "b.json"):
+        for _ in range(5):
+            record = make_record("Successfully read JSON file")
+            record.created = 1000.5
+            record.path = path
+            kept.append(sampler.filter(record))
+    assert kept == [True] * 3 + [False] * 2 + [True] * 3 + [False] * 2
+    record = make_record("Successfully read JSON file")
+    record.created = 1001.5
+    record.path = "a.json"
+    assert sampler.filter(record)